@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Cross-posts blog content to every platform in one process.
+Reads detect_posts_to_publish.py output once and posts to all platforms
+concurrently, each over its own pool of keep-alive connections and with
+its own concurrency limit. Jobs go through the outbox, so failed posts
+are retried with backoff here or in a later run. Writes the same
+<platform>_results.json files as the post_to_*.py scripts.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import requests
+from typing import Dict, List
+from requests.adapters import HTTPAdapter
+from detect_posts_to_publish import load_ledger
+from outbox import (
+    MAX_ATTEMPTS,
+    Outbox,
+    backoff,
+    is_retryable,
+    outcome_unknown,
+    server_delay,
+)
+from post_to_devto import format_devto_article, post_to_devto
+from post_to_mastodon import format_mastodon_message, post_to_mastodon
+from post_to_telegram import format_telegram_message, post_to_telegram
+from post_to_twitter import format_twitter_message, post_to_twitter_v2
+
+# Requests in flight per platform. Telegram and Dev.to go one at a time to
+# keep channel order and stay clear of their posting rate limits.
+PLATFORM_CONCURRENCY = {
+    "telegram": 1,
+    "twitter": 2,
+    "mastodon": 4,
+    "devto": 1,
+}
+
+# Platforms that deduplicate a retried post by the job's idempotency key
+IDEMPOTENT_PLATFORMS = {"mastodon"}
+
+# Longest a run waits to retry; later retries are left to the next run
+MAX_WAIT = 120
+
+
+def build_adapters(args) -> Dict[str, tuple]:
+    """
+    Return {platform: (format, send)} for every platform with credentials.
+    format(file_path, post_info) builds the payload and
+    send(payload, session, key) posts it, returning True on success.
+    """
+    adapters = {}
+    if args.telegram_bot_token and args.telegram_channel_id:
+        adapters["telegram"] = (
+            lambda file_path, post_info: format_telegram_message(post_info),
+            lambda message, session, key: post_to_telegram(
+                args.telegram_bot_token,
+                args.telegram_channel_id,
+                message,
+                session=session,
+            ),
+        )
+    if (
+        args.twitter_api_key
+        and args.twitter_api_secret
+        and args.twitter_access_token
+        and args.twitter_access_token_secret
+    ):
+        adapters["twitter"] = (
+            lambda file_path, post_info: format_twitter_message(post_info),
+            lambda message, session, key: post_to_twitter_v2(
+                "",
+                args.twitter_access_token,
+                args.twitter_access_token_secret,
+                args.twitter_api_key,
+                args.twitter_api_secret,
+                message,
+                session=session,
+            ),
+        )
+    if args.mastodon_instance_url and args.mastodon_access_token:
+        adapters["mastodon"] = (
+            lambda file_path, post_info: format_mastodon_message(post_info),
+            lambda message, session, key: post_to_mastodon(
+                args.mastodon_instance_url,
+                args.mastodon_access_token,
+                message,
+                session=session,
+                idempotency_key=key,
+            ),
+        )
+    if args.devto_api_key:
+        adapters["devto"] = (
+            lambda file_path, post_info: format_devto_article(
+                post_info, file_path, args.devto_mode
+            ),
+            lambda article, session, key: post_to_devto(
+                args.devto_api_key, article, session=session
+            ),
+        )
+    return adapters
+
+
+# The post_to_* functions only return a bool, so the response they got, or
+# the exception they caught, is remembered by the session; each call runs on
+# its own worker thread
+_last = threading.local()
+
+
+class RecordingSession(requests.Session):
+    def request(self, *args, **kwargs):
+        try:
+            response = super().request(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            _last.error = e
+            raise
+        _last.response = response
+        return response
+
+
+def make_session(pool_size: int) -> requests.Session:
+    session = RecordingSession()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def send_job(send, payload, session, key):
+    """Return (success, response, error); response is None and error the
+    exception when the request got no response."""
+    _last.response = _last.error = None
+    success = send(payload, session, key)
+    return success, _last.response, _last.error
+
+
+async def run_job(job, adapter, session, semaphore, paused, outbox, deadline):
+    """
+    Post one outbox job, retrying until it succeeds, fails for good, or its
+    next attempt would be after the deadline.
+    """
+    format_payload, send = adapter
+    platform, file_path = job["platform"], job["file"]
+    payload = format_payload(file_path, job["post_info"])
+    while True:
+        async with semaphore:
+            # Wait out a rate limit another job on this platform ran into
+            wait = paused.get(platform, 0) - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            success, response, failure = await asyncio.to_thread(
+                send_job, send, payload, session, job["key"]
+            )
+        # Also set on success when the quota just ran out, so the other jobs
+        # on this platform wait instead of collecting 429s
+        delay = server_delay(response)
+        if delay is not None:
+            paused[platform] = max(paused.get(platform, 0), time.time() + delay)
+        if success:
+            outbox.done(job)
+            return True
+
+        if delay is None:
+            delay = backoff(job["attempts"])
+        if response is not None:
+            error = f"HTTP {response.status_code}"
+        else:
+            error = type(failure).__name__ if failure else "no response"
+        # Retrying could post twice where the platform can't deduplicate
+        if outcome_unknown(response, failure, platform in IDEMPOTENT_PLATFORMS):
+            outbox.park(job, f"{error}, may have been posted")
+            print(
+                f"? {file_path} on {platform} may have been posted ({error}); "
+                f"parked in {outbox.dead_path} until checked",
+                file=sys.stderr,
+            )
+            return False
+        retry_at = outbox.failed(job, error, delay)
+        if retry_at is None:
+            print(
+                f"✗ Failed to post {file_path} to {platform} ({error}) "
+                f"{MAX_ATTEMPTS} times; parked in {outbox.dead_path}",
+                file=sys.stderr,
+            )
+            return False
+        if not is_retryable(response) or retry_at > deadline:
+            print(
+                f"✗ Failed to post {file_path} to {platform} ({error}), "
+                f"attempt {job['attempts']}/{MAX_ATTEMPTS}; left in the outbox",
+                file=sys.stderr,
+            )
+            return False
+        print(
+            f"… Retrying {file_path} on {platform} in {delay:.1f}s ({error})",
+            file=sys.stderr,
+        )
+        await asyncio.sleep(delay)
+
+
+def print_dry_run(posts: Dict, adapters: Dict):
+    for file_path, post_info in posts.items():
+        for platform in post_info.get("platforms", []):
+            if platform not in adapters:
+                continue
+            payload = adapters[platform][0](file_path, post_info)
+            print(f"\n--- DRY RUN: {platform} <- {file_path} ---", file=sys.stderr)
+            print(
+                payload if isinstance(payload, str) else json.dumps(payload, indent=2),
+                file=sys.stderr,
+            )
+
+
+async def dispatch(posts: Dict, adapters: Dict, outbox: Outbox, max_wait=MAX_WAIT):
+    """
+    Queue every post for each of its pending platforms, then post all due
+    outbox jobs concurrently. Returns {platform: [file paths posted]},
+    including jobs a previous run posted but didn't get to record.
+    """
+    for file_path, post_info in posts.items():
+        for platform in post_info.get("platforms", []):
+            if platform not in adapters:
+                print(
+                    f"○ Skipping {file_path} on {platform} (no credentials)",
+                    file=sys.stderr,
+                )
+                continue
+            outbox.enqueue(file_path, platform, post_info)
+    outbox.discard_posted(load_ledger())
+    outbox.save()
+
+    jobs = [job for job in outbox.due() if job["platform"] in adapters]
+    sessions = {
+        platform: make_session(PLATFORM_CONCURRENCY.get(platform, 1))
+        for platform in adapters
+    }
+    semaphores = {
+        platform: asyncio.Semaphore(PLATFORM_CONCURRENCY.get(platform, 1))
+        for platform in adapters
+    }
+    paused = {}
+    deadline = time.time() + max_wait
+
+    try:
+        await asyncio.gather(
+            *[
+                run_job(
+                    job,
+                    adapters[job["platform"]],
+                    sessions[job["platform"]],
+                    semaphores[job["platform"]],
+                    paused,
+                    outbox,
+                    deadline,
+                )
+                for job in jobs
+            ]
+        )
+    finally:
+        for session in sessions.values():
+            session.close()
+
+    results = {platform: [] for platform in adapters}
+    for job in outbox.posted():
+        results.setdefault(job["platform"], []).append(job["file"])
+    pending = len(outbox.jobs) - len(outbox.posted())
+    if pending:
+        print(f"○ {pending} job(s) pending in {outbox.path}", file=sys.stderr)
+    if outbox.dead:
+        print(
+            f"? {len(outbox.dead)} job(s) parked in {outbox.dead_path} need checking",
+            file=sys.stderr,
+        )
+    return results
+
+
+def write_results(results: Dict[str, List[str]]):
+    for platform, successful_posts in results.items():
+        print(
+            f"=== Posted {len(successful_posts)} article(s) to {platform} ===",
+            file=sys.stderr,
+        )
+        output = {"successful_posts": successful_posts, "platform": platform}
+        with open(f"{platform}_results.json", "w") as f:
+            json.dump(output, f, indent=2)
+
+
+def main():
+    """
+    Main entry point. Reads posts from stdin (JSON) and posts to every
+    platform that has credentials, given as flags or environment variables.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Post blog content to all social platforms concurrently"
+    )
+    credentials = [
+        ("--telegram-bot-token", "TELEGRAM_BOT_TOKEN"),
+        ("--telegram-channel-id", "TELEGRAM_CHANNEL_ID"),
+        ("--twitter-api-key", "TWITTER_API_KEY"),
+        ("--twitter-api-secret", "TWITTER_API_SECRET"),
+        ("--twitter-access-token", "TWITTER_ACCESS_TOKEN"),
+        ("--twitter-access-token-secret", "TWITTER_ACCESS_TOKEN_SECRET"),
+        ("--mastodon-instance-url", "MASTODON_INSTANCE_URL"),
+        ("--mastodon-access-token", "MASTODON_ACCESS_TOKEN"),
+        ("--devto-api-key", "DEVTO_API_KEY"),
+    ]
+    for flag, env in credentials:
+        parser.add_argument(
+            flag, default=os.environ.get(env), help=f"(default: ${env})"
+        )
+    parser.add_argument(
+        "--devto-mode",
+        choices=["full", "link"],
+        default="full",
+        help='Dev.to posting mode: "full" article cross-post or "link" with excerpt',
+    )
+    parser.add_argument(
+        "--posts-json",
+        help="JSON file with posts to publish (default: read from stdin)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print payloads without posting"
+    )
+
+    args = parser.parse_args()
+
+    # Read posts data
+    if args.posts_json:
+        with open(args.posts_json, "r") as f:
+            posts = json.load(f)
+    else:
+        posts = json.load(sys.stdin)
+
+    adapters = build_adapters(args)
+    if args.dry_run:
+        print_dry_run(posts, adapters)
+        return 0
+
+    # Runs even without new posts, to retry what earlier runs left pending
+    results = asyncio.run(dispatch(posts, adapters, Outbox()))
+    write_results(results)
+
+    # Always return 0 - failed posts stay in the outbox for the next run
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
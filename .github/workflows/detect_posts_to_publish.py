@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
 """
 Detects which blog posts need to be cross-posted to social media platforms.
-Tracks posting status in markdown frontmatter via 'posted_to' field.
+Tracks posting status in an append-only ledger (one JSON line per post and
+platform), so marking a post as published never rewrites its markdown. The
+'posted_to' frontmatter field of older posts is still honoured.
 """
 
+import os
 import glob
+import json
 import yaml
 import subprocess
 import sys
 from datetime import datetime
 from typing import List, Dict, Set
+from outbox import DEAD_LETTER_PATH, OUTBOX_PATH, Outbox
+
+LEDGER_PATH = ".github/posting_ledger.jsonl"
+# Committed together after each run: what was posted, what is pending and
+# what is parked
+STATE_PATHS = (LEDGER_PATH, OUTBOX_PATH, DEAD_LETTER_PATH)
 
 
 def get_changed_markdown_files() -> List[str]:
@@ -76,81 +86,117 @@ def parse_frontmatter(file_path: str) -> Dict:
         return {}
 
 
-def get_platforms_to_post(metadata: Dict) -> List[str]:
+def get_platforms_to_post(metadata: Dict, posted: Set[str] = frozenset()) -> List[str]:
     """
     Determine which platforms still need posting.
-    Returns list of platforms that haven't been posted to yet.
+    Returns list of platforms that are neither in the ledger (posted) nor in
+    the post's legacy 'posted_to' field.
     """
     all_platforms = set(metadata.get("platforms", ["twitter", "linkedin", "telegram"]))
-    posted_platforms = set(metadata.get("posted_to", []))
+    posted_platforms = set(metadata.get("posted_to", [])) | set(posted)
 
     # Return platforms that need posting
     return list(all_platforms - posted_platforms)
 
 
-def update_frontmatter(file_path: str, platform: str) -> bool:
+def load_ledger(path: str = LEDGER_PATH) -> Dict[str, Dict[str, str]]:
     """
-    Update the markdown file to mark a platform as posted.
-    Adds platform to 'posted_to' list in frontmatter.
+    Read the posting ledger in one pass.
+    Returns {file path: {platform: posted_at}}; later lines win.
     """
+    ledger = {}
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        parts = content.split("---", 2)
-        if len(parts) < 3:
-            return False
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    ledger.setdefault(record["file"], {})[record["platform"]] = record[
+                        "posted_at"
+                    ]
+                except (ValueError, KeyError):
+                    print(
+                        f"Warning: skipping bad ledger line {line_number}",
+                        file=sys.stderr,
+                    )
+    except FileNotFoundError:
+        pass
+    return ledger
 
-        frontmatter = parts[1].strip()
-        metadata = yaml.safe_load(frontmatter)
 
-        # Add platform to posted_to list
-        if "posted_to" not in metadata:
-            metadata["posted_to"] = []
+def record_postings(postings: List[tuple], path: str = LEDGER_PATH) -> List[tuple]:
+    """
+    Append (file path, platform) pairs to the ledger in a single write.
+    Pairs already in the ledger are skipped; returns the ones recorded.
+    """
+    ledger = load_ledger(path)
+    posted_at = datetime.utcnow().isoformat()
+    recorded = []
+    lines = []
+    for file_path, platform in postings:
+        if platform in ledger.get(file_path, {}) or (file_path, platform) in recorded:
+            continue
+        recorded.append((file_path, platform))
+        record = {"file": file_path, "platform": platform, "posted_at": posted_at}
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
 
-        if platform not in metadata["posted_to"]:
-            metadata["posted_to"].append(platform)
+    if lines:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+    return recorded
 
-        # Add timestamp for this posting
-        timestamp_key = f"posted_{platform}_at"
-        metadata[timestamp_key] = datetime.utcnow().isoformat()
 
-        # Reconstruct the file
-        new_frontmatter = yaml.dump(
-            metadata, default_flow_style=False, allow_unicode=True
-        )
-        new_content = f"---\n{new_frontmatter}---{parts[2]}"
+def load_results(results_files: List[str]) -> List[tuple]:
+    """
+    Collect (file path, platform) pairs from the post_to_* result files.
+    Missing files are skipped, since a platform step may not have run.
+    """
+    postings = []
+    for results_file in results_files:
+        try:
+            with open(results_file, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            continue
+        platform = results["platform"]
+        for file_path in results.get("successful_posts", []):
+            postings.append((file_path, platform))
+    return postings
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(new_content)
 
-        return True
-    except Exception as e:
-        print(f"Error updating {file_path}: {e}", file=sys.stderr)
-        return False
+def is_tracked(path: str) -> bool:
+    result = subprocess.run(
+        ["git", "ls-files", "--error-unmatch", "--", path], capture_output=True
+    )
+    return result.returncode == 0
 
 
-def commit_frontmatter_changes(files: List[str], message: str = None):
+def commit_ledger(message: str, paths: tuple = STATE_PATHS) -> bool:
     """
-    Commit the updated markdown files back to git.
+    Commit the ledger and outbox back to git, if either changed.
+    Returns False if committing failed.
     """
-    if not files:
-        return
-
+    # A drained outbox is deleted, and a path that neither exists nor is
+    # tracked would make git add fail
+    paths = [path for path in paths if os.path.exists(path) or is_tracked(path)]
+    if not paths:
+        print("No posting status changes to commit")
+        return True
     try:
-        # Stage the files
-        subprocess.run(["git", "add"] + files, check=True)
-
-        # Create commit message
-        if message is None:
-            message = f"Update posting status for {len(files)} blog post(s) [skip ci]"
-
-        # Commit
+        # -A also stages the outbox's removal once it drains
+        subprocess.run(["git", "add", "-A", "--", *paths], check=True)
+        staged = subprocess.run(["git", "diff", "--cached", "--quiet", "--", *paths])
+        if staged.returncode == 0:
+            print("No posting status changes to commit")
+            return True
         subprocess.run(["git", "commit", "-m", message], check=True)
-
-        print(f"✓ Committed updates to {len(files)} file(s)")
+        print(f"✓ Committed {', '.join(paths)}")
+        return True
     except subprocess.CalledProcessError as e:
         print(f"Error committing changes: {e}", file=sys.stderr)
+        return False
 
 
 def detect_posts_to_publish() -> Dict[str, Dict]:
@@ -179,6 +225,8 @@ def detect_posts_to_publish() -> Dict[str, Dict]:
     # Only print to stderr so it doesn't break JSON output
     print(f"Found {len(changed_files)} changed markdown file(s)", file=sys.stderr)
 
+    ledger = load_ledger()
+
     for file_path in changed_files:
         metadata = parse_frontmatter(file_path)
 
@@ -186,7 +234,7 @@ def detect_posts_to_publish() -> Dict[str, Dict]:
             continue
 
         # Get platforms that still need posting
-        platforms = get_platforms_to_post(metadata)
+        platforms = get_platforms_to_post(metadata, set(ledger.get(file_path, {})))
 
         if platforms:
             # Build the full URL
@@ -215,9 +263,8 @@ def main():
     """
     CLI entry point. Can be used in two modes:
     1. Detect mode (default): Returns JSON of posts to publish
-    2. Update mode: Marks a post as published to a platform
+    2. Update mode: Records posts as published in the posting ledger
     """
-    import json
     import argparse
 
     parser = argparse.ArgumentParser(
@@ -226,34 +273,52 @@ def main():
     parser.add_argument(
         "--update",
         metavar="FILE:PLATFORM",
-        help="Update a file to mark platform as posted (e.g., blog_posts/example.md:twitter)",
+        action="append",
+        default=[],
+        help="Mark a file as posted to a platform (e.g., blog_posts/example.md:twitter); can be repeated",
     )
     parser.add_argument(
-        "--commit", action="store_true", help="Commit the changes after updating"
+        "--results",
+        metavar="RESULTS_JSON",
+        nargs="+",
+        default=[],
+        help="Mark every successful post in these post_to_* result files as posted",
+    )
+    parser.add_argument(
+        "--commit",
+        action="store_true",
+        help="Commit the ledger and outbox after updating",
     )
 
     args = parser.parse_args()
 
-    if args.update:
-        # Update mode: mark a post as published
-        try:
-            file_path, platform = args.update.split(":")
-            success = update_frontmatter(file_path, platform)
+    if args.update or args.results or args.commit:
+        # Update mode: record every posting of this run in one ledger write
+        postings = load_results(args.results)
+        for update in args.update:
+            try:
+                file_path, platform = update.split(":")
+            except ValueError:
+                print("Error: --update format should be FILE:PLATFORM", file=sys.stderr)
+                sys.exit(1)
+            postings.append((file_path, platform))
 
-            if success:
-                print(f"✓ Marked {file_path} as posted to {platform}")
+        recorded = record_postings(postings)
+        for file_path, platform in recorded:
+            print(f"✓ Marked {file_path} as posted to {platform}")
 
-                if args.commit:
-                    commit_frontmatter_changes(
-                        [file_path],
-                        f"Mark {file_path} as posted to {platform} [skip ci]",
-                    )
-            else:
-                print(f"✗ Failed to update {file_path}", file=sys.stderr)
+        # Posted jobs have done their job once they're in the ledger
+        outbox = Outbox()
+        outbox.discard_posted(load_ledger())
+        outbox.save()
+
+        if args.commit:
+            files = {file_path for file_path, _ in recorded}
+            committed = commit_ledger(
+                f"Update posting status for {len(files)} blog post(s) [skip ci]"
+            )
+            if not committed:
                 sys.exit(1)
-        except ValueError:
-            print("Error: --update format should be FILE:PLATFORM", file=sys.stderr)
-            sys.exit(1)
     else:
         # Detect mode: find posts that need publishing
         posts = detect_posts_to_publish()
@@ -1,215 +1,115 @@
+import os
+import sys
 import glob
-import yaml
+import json
+import logging
+
+# Share the app's feed builder, markdown parsing and on-disk render cache
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from app.feeds import ARCHIVE_DIR, FEED_FORMAT, SUMMARY_ONLY, build_feeds, feed_entry
+from app.loader import load_posts
+from app.render_cache import MARKDOWN_EXTENSIONS, render_cache
+from app.utils import hash_file
 import markdown
-import xml.etree.ElementTree as ET
-from datetime import datetime
-from html import escape
 
+# Serialized feed entries from the previous run, keyed by file and content
+# hash
+MANIFEST_PATH = ".cache/feeds/manifest.json"
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("key") != manifest_key():
+        return {}
+    return manifest["posts"]
+
+
+def manifest_key():
+    return {
+        "format": FEED_FORMAT,
+        "summary_only": SUMMARY_ONLY,
+        "markdown": markdown.__version__,
+        "extensions": MARKDOWN_EXTENSIONS,
+    }
+
+
+def save_manifest(entries):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    data = json.dumps({"key": manifest_key(), "posts": entries}, ensure_ascii=False)
+    write_if_changed(MANIFEST_PATH, data.encode("utf-8"))
+
+
+def write_if_changed(path, data):
+    """Write data to path unless it already holds exactly these bytes."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def load_entries():
+    """Return feed entries for every post, newest first.
+
+    Only posts whose content hash changed since the last run are parsed and
+    serialized; the rest are reused from the manifest.
+    """
+    previous = load_manifest()
+    entries = {}
+    changed = []
+    for file_path in glob.glob("blog_posts/*.md"):
+        cached = previous.get(file_path)
+        if cached is not None and cached["digest"] == hash_file(file_path):
+            entries[file_path] = cached
+        else:
+            changed.append(file_path)
+
+    loaded, _ = load_posts(changed)
+    for result in loaded:
+        post = result["post"]
+        entries[result["file"]] = {"digest": result["digest"], **feed_entry(post)}
+
+    save_manifest(entries)
+    print(
+        f"✓ Parsed {len(loaded)} changed post(s), reused {len(entries) - len(loaded)}"
+    )
+    return sorted(entries.values(), key=lambda x: x["date"], reverse=True)
 
-def parse_markdown_file(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        content = file.read()
-        _, frontmatter, markdown_content = content.split("---", 2)
-        metadata = yaml.safe_load(frontmatter)
-        html_content = markdown.markdown(markdown_content, extensions=["fenced_code"])
-        return {**metadata, "content": html_content}
-
-
-def generate_atom_feed():
-    """Generate Atom 1.0 feed"""
-    blog_posts = []
-    blog_post_files = glob.glob("blog_posts/*.md")
-
-    for file_path in blog_post_files:
-        try:
-            post = parse_markdown_file(file_path)
-            blog_posts.append(post)
-        except Exception as e:
-            print(f"Error parsing blog post {file_path}: {str(e)}")
-
-    # Sort posts by date, newest first
-    posts = sorted(blog_posts, key=lambda x: x["date"], reverse=True)
-
-    domain = "https://mlship.dev"
-
-    # Create Atom feed with proper namespace
-    atom = ET.Element("feed", xmlns="http://www.w3.org/2005/Atom")
 
-    # Add required feed elements
-    ET.SubElement(atom, "title").text = "Egor's personal blog"
-    ET.SubElement(atom, "id").text = f"{domain}/"
+def write_feeds(entries):
+    feeds = build_feeds(entries)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for name, data in feeds.items():
+        if write_if_changed(name, data):
+            print(f"✓ Generated {name}")
 
-    # Add both link types (alternate and self)
-    ET.SubElement(atom, "link", href=domain, rel="alternate", type="text/html")
-    # Self link should point to exactly where this feed is served
-    ET.SubElement(
-        atom, "link", href=f"{domain}/atom.xml", rel="self", type="application/atom+xml"
-    )
+    # Archive pages are content-addressed, so replaced pages are left behind
+    for name in os.listdir(ARCHIVE_DIR):
+        if f"{ARCHIVE_DIR}/{name}" not in feeds:
+            os.remove(os.path.join(ARCHIVE_DIR, name))
+            print(f"✓ Removed {ARCHIVE_DIR}/{name}")
 
-    # Add updated timestamp (use most recent post date or current time)
-    if posts:
-        most_recent = datetime.strptime(posts[0]["date"], "%Y-%m-%d")
-        # Use noon UTC for consistency
-        updated_time = most_recent.strftime("%Y-%m-%dT12:00:00Z")
-    else:
-        # Use current date at noon UTC
-        updated_time = datetime.utcnow().strftime("%Y-%m-%dT12:00:00Z")
-    ET.SubElement(atom, "updated").text = updated_time
-
-    # Add author
-    author = ET.SubElement(atom, "author")
-    ET.SubElement(author, "name").text = "Egor Kosaretsky"
-
-    # Add subtitle (optional but recommended)
-    ET.SubElement(atom, "subtitle").text = "Thoughts on software, technology, and life"
-
-    # Add entries
-    for post in posts:
-        entry = ET.SubElement(atom, "entry")
-
-        # Required entry elements
-        ET.SubElement(entry, "title").text = post["title"]
-        ET.SubElement(entry, "id").text = f"{domain}/blog/{post['slug']}"
-
-        # Link to the post
-        ET.SubElement(
-            entry,
-            "link",
-            href=f"{domain}/blog/{post['slug']}",
-            rel="alternate",
-            type="text/html",
-        )
-
-        # Updated timestamp in proper ISO 8601 format (no microseconds)
-        post_date = datetime.strptime(post["date"], "%Y-%m-%d")
-        ET.SubElement(entry, "updated").text = post_date.strftime("%Y-%m-%dT12:00:00Z")
-        ET.SubElement(entry, "published").text = post_date.strftime(
-            "%Y-%m-%dT12:00:00Z"
-        )
-
-        # Author (can be per-entry or inherited from feed)
-        entry_author = ET.SubElement(entry, "author")
-        ET.SubElement(entry_author, "name").text = "Egor Kosaretsky"
-
-        # Summary (plain text excerpt)
-        if post.get("excerpt"):
-            ET.SubElement(entry, "summary", type="text").text = post["excerpt"]
-
-        # Content (HTML)
-        content = ET.SubElement(entry, "content", type="html")
-        content.text = post.get("content", "")
-
-    # Convert to string with proper XML declaration
-    atom_xml = ET.tostring(atom, encoding="unicode", method="xml")
-
-    # Write to file
-    with open("atom.xml", "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        f.write(atom_xml)
-
-    print(f"✓ Generated atom.xml with {len(posts)} blog posts")
-
-
-def generate_rss_feed():
-    """Generate RSS 2.0 feed"""
-    blog_posts = []
-    blog_post_files = glob.glob("blog_posts/*.md")
-
-    for file_path in blog_post_files:
-        try:
-            post = parse_markdown_file(file_path)
-            blog_posts.append(post)
-        except Exception as e:
-            print(f"Error parsing blog post {file_path}: {str(e)}")
-
-    # Sort posts by date, newest first
-    posts = sorted(blog_posts, key=lambda x: x["date"], reverse=True)
-
-    domain = "https://mlship.dev"
-
-    # Create RSS feed with proper namespace
-    rss = ET.Element("rss", version="2.0")
-    rss.set("xmlns:atom", "http://www.w3.org/2005/Atom")
-    rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
-
-    channel = ET.SubElement(rss, "channel")
-
-    # Required channel elements
-    ET.SubElement(channel, "title").text = "Egor's personal blog"
-    ET.SubElement(channel, "link").text = domain
-    ET.SubElement(
-        channel, "description"
-    ).text = "Thoughts on software, technology, and life"
-
-    # Add atom:link for feed autodiscovery
-    ET.SubElement(
-        channel,
-        "{http://www.w3.org/2005/Atom}link",
-        href=f"{domain}/rss.xml",
-        rel="self",
-        type="application/rss+xml",
-    )
-
-    # Optional but recommended channel elements
-    ET.SubElement(channel, "language").text = "en-us"
-    ET.SubElement(
-        channel, "managingEditor"
-    ).text = "egor@kosaretsky.co.uk (Egor Kosaretsky)"
-    ET.SubElement(channel, "webMaster").text = "egor@kosaretsky.co.uk (Egor Kosaretsky)"
-
-    # Add last build date
-    if posts:
-        most_recent = datetime.strptime(posts[0]["date"], "%Y-%m-%d")
-        last_build = most_recent.strftime("%a, %d %b %Y %H:%M:%S +0000")
-    else:
-        last_build = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S +0000")
-    ET.SubElement(channel, "lastBuildDate").text = last_build
-    ET.SubElement(channel, "pubDate").text = last_build
-
-    # Add items
-    for post in posts:
-        item = ET.SubElement(channel, "item")
-
-        # Required item elements
-        ET.SubElement(item, "title").text = post["title"]
-        ET.SubElement(item, "link").text = f"{domain}/blog/{post['slug']}"
-        ET.SubElement(
-            item, "guid", isPermaLink="true"
-        ).text = f"{domain}/blog/{post['slug']}"
-
-        # Description (plain text or HTML)
-        if post.get("excerpt"):
-            ET.SubElement(item, "description").text = post["excerpt"]
-
-        # Full content using content:encoded
-        content_encoded = ET.SubElement(
-            item, "{http://purl.org/rss/1.0/modules/content/}encoded"
-        )
-        content_encoded.text = post.get("content", "")
-
-        # Publication date in RFC 822 format
-        post_date = datetime.strptime(post["date"], "%Y-%m-%d")
-        pub_date = post_date.strftime("%a, %d %b %Y %H:%M:%S +0000")
-        ET.SubElement(item, "pubDate").text = pub_date
-
-        # Author
-        ET.SubElement(item, "author").text = "egor@kosaretsky.co.uk (Egor Kosaretsky)"
-
-    # Convert to string with proper XML declaration
-    rss_xml = ET.tostring(rss, encoding="unicode", method="xml")
-
-    # Write to file
-    with open("rss.xml", "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        f.write(rss_xml)
-
-    print(f"✓ Generated rss.xml with {len(posts)} blog posts")
+    archived = sum(name.startswith(ARCHIVE_DIR) for name in feeds)
+    print(f"✓ Feeds cover {len(entries)} blog posts, {archived} archive page(s)")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
     print("Generating feeds...")
-    generate_atom_feed()
-    generate_rss_feed()
+    write_feeds(load_entries())
+    stats = render_cache.stats()
+    print(
+        f"✓ Markdown render cache: {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['entries']} entries ({stats['bytes']} bytes)"
+    )
     print("\nDone! Validate your feeds at:")
     print("  - https://validator.w3.org/feed/")
     print("  - https://www.feedvalidator.org/")
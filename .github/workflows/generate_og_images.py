@@ -1,105 +1,121 @@
 import os
-import yaml
+import sys
 import glob
-from PIL import Image, ImageDraw, ImageFont
-import textwrap
-import cairosvg
-from io import BytesIO
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
 
+# Share the app's post loader and OG image layout
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from app.loader import MIN_PARALLEL, WORKERS, load_posts
+from app.og import (
+    FORMATS,
+    PREBUILT_DIR,
+    text_key,
+    write_prebuilt_keys,
+    generate_og_image,
+    image_key,
+    load_resources,
+    template_digest,
+)
+from app.utils import hash_file, parse_post_metadata
 
-def generate_og_image(title, description, output_path):
-    width, height = 1200, 630
-    background_color = "#1e1e2e"  # Catppuccin Mocha Base
-    title_color = "#cdd6f4"  # Catppuccin Mocha Text
-    description_color = "#a6adc8"  # Catppuccin Mocha Subtext0
+OUTPUT_DIR = PREBUILT_DIR
 
-    image = Image.new("RGB", (width, height), color=background_color)
-    draw = ImageDraw.Draw(image)
+# {post file: {digest, template, slug, key}} from the previous run
+MANIFEST_PATH = ".cache/og/manifest.json"
 
-    # Load fonts (assuming fonts are in the .github/workflows directory)
-    title_font = ImageFont.truetype("assets/opengraph/fonts/UbuntuMono-Bold.ttf", 60)
-    description_font = ImageFont.truetype(
-        "assets/opengraph/fonts/UbuntuMono-Regular.ttf", 30
-    )
 
-    # Load and paste the SVG icon
-    svg_path = "assets/index/favicon.svg"
-    icon_size = 100  # Adjust this value to change the size of the icon
-    png_data = cairosvg.svg2png(
-        url=svg_path, output_width=icon_size, output_height=icon_size
-    )
-    icon = Image.open(BytesIO(png_data))
-    image.paste(icon, (20, 20), icon)  # 20,20 is the position. Adjust as needed.
-
-    # Draw title
-    title_wrapped = textwrap.wrap(title, width=30)
-    y_text = 50
-    for line in title_wrapped:
-        bbox = title_font.getbbox(line)
-        line_width = bbox[2] - bbox[0]
-        line_height = bbox[3] - bbox[1]
-        draw.text(
-            ((width - line_width) / 2, y_text), line, font=title_font, fill=title_color
-        )
-        y_text += line_height
-
-    # Draw description
-    description_wrapped = textwrap.wrap(description, width=60)
-    y_text = 300
-    for line in description_wrapped[:4]:  # Limit to 4 lines
-        bbox = description_font.getbbox(line)
-        line_width = bbox[2] - bbox[0]
-        line_height = bbox[3] - bbox[1]
-        draw.text(
-            ((width - line_width) / 2, y_text),
-            line,
-            font=description_font,
-            fill=description_color,
-        )
-        y_text += line_height
-
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-    # Save the image
-    image.save(output_path)
-
-
-def parse_frontmatter(content):
-    # Split the content into frontmatter and body
-    _, frontmatter, _ = content.split("---", 2)
-    # Parse the frontmatter as YAML
-    metadata = yaml.safe_load(frontmatter)
-    return metadata
+def outputs_exist(slug):
+    return all(os.path.exists(os.path.join(OUTPUT_DIR, slug + ext)) for ext in FORMATS)
 
 
-def main():
-    # Generate images for all blog posts
-    blog_posts = glob.glob("blog_posts/*.md")
-    for post in blog_posts:
-        with open(post, "r") as f:
-            content = f.read()
-            # Parse frontmatter to extract metadata
-            metadata = parse_frontmatter(content)
-
-            # Extract title, description (excerpt), and slug from metadata
-            title = metadata.get("title", "")
-            description = metadata.get("excerpt", "")
-            slug = metadata.get("slug", "")
-
-            # If slug is not provided, use the filename without extension as a fallback
-            if not slug:
-                slug = os.path.basename(post).replace(".md", "")
-
-            generate_og_image(title, description, f"assets/opengraph/images/{slug}.png")
-            print(
-                f'Generated image with title: "{title}" and description "{description}" for slug: {slug}'
-            )
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
 
+
+def render_job(job):
+    slug, title, description = job
+    generate_og_image(title, description, os.path.join(OUTPUT_DIR, f"{slug}.png"))
+    return slug
+
+
+def main():
+    previous = load_manifest()
+    template = template_digest()
+    manifest = {}
+
+    # Unchanged posts whose images exist are skipped without parsing them
+    changed = []
+    for file_path in glob.glob("blog_posts/*.md"):
+        digest = hash_file(file_path)
+        entry = previous.get(file_path)
+        if (
+            entry is not None
+            and entry["digest"] == digest
+            and entry["template"] == template
+            and "text_key" in entry
+            and outputs_exist(entry["slug"])
+        ):
+            manifest[file_path] = entry
+        else:
+            changed.append(file_path)
+
+    blog_posts, _ = load_posts(changed, parse=parse_post_metadata)
+    jobs = []
+    for result in blog_posts:
+        metadata = result["post"]
+
+        # Extract title, description (excerpt), and slug from metadata
+        title = metadata.get("title", "")
+        description = metadata.get("excerpt", "")
+        slug = metadata.get("slug", "")
+
+        # If slug is not provided, use the filename without extension as a fallback
+        if not slug:
+            slug = os.path.basename(result["file"]).replace(".md", "")
+
+        key = image_key(title, description)
+        entry = previous.get(result["file"])
+        if entry is None or entry["key"] != key or not outputs_exist(slug):
+            jobs.append((slug, title, description))
+        manifest[result["file"]] = {
+            "digest": result["digest"],
+            "template": template,
+            "slug": slug,
+            "key": key,
+            "text_key": text_key(title, description),
+        }
+
+    if len(jobs) < MIN_PARALLEL or WORKERS <= 1:
+        rendered = [render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(WORKERS, initializer=load_resources) as pool:
+            rendered = list(pool.map(render_job, jobs, chunksize=8))
+    for slug in rendered:
+        print(f"Generated OG image for slug: {slug}")
+
+    save_manifest(manifest)
+    # What the server checks before serving these images instead of its own
+    write_prebuilt_keys(
+        {entry["slug"]: entry["text_key"] for entry in manifest.values()}
+    )
     print(
-        f"Generated {len(blog_posts)} OG images in Catppuccin Mocha style with favicon."
+        f"Generated {len(rendered)} OG images in Catppuccin Mocha style with favicon, "
+        f"{len(manifest) - len(rendered)} up to date."
     )
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
     main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Durable outbox of cross-posting jobs, one per (post, platform).
+Jobs that fail without having posted stay in the outbox with a retry time
+from the platform's Retry-After or rate-limit headers, or from exponential
+backoff with jitter, so a later run picks them up instead of the post being
+silently skipped. Jobs that may have posted (a read timeout, say) or that
+ran out of attempts are parked in a dead-letter file, which nothing retries.
+Once someone has checked the platform, a parked job is recorded with
+detect_posts_to_publish.py --update FILE:PLATFORM if it did post, or moved
+back to the outbox with its attempts reset to retry it.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+import requests
+from urllib3.exceptions import NewConnectionError
+
+OUTBOX_PATH = ".github/posting_outbox.json"
+# Parked jobs; kept apart so they don't trigger the scheduled retry runs
+DEAD_LETTER_PATH = ".github/posting_dead_letter.json"
+
+# Backoff is BACKOFF_BASE * 2**attempts seconds with full jitter, capped
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 15 * 60
+# After this many failed attempts a job is parked
+MAX_ATTEMPTS = 8
+
+
+def job_key(file_path: str, platform: str) -> str:
+    """
+    Idempotency key for a job. Stable across runs, so the same post is never
+    queued (or, where the platform supports it, accepted) twice.
+    """
+    return hashlib.sha256(f"{platform}:{file_path}".encode("utf-8")).hexdigest()[:32]
+
+
+def _parse_reset(value: str, now: float) -> Optional[float]:
+    """Seconds until a reset given as delta seconds, epoch seconds or a date."""
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        pass
+    else:
+        # Epoch timestamps (Twitter's x-rate-limit-reset) vs delta seconds
+        return number - now if number > 1e9 else number
+    for parse in (parsedate_to_datetime, datetime.fromisoformat):
+        try:
+            when = parse(value.replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            continue
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return when.timestamp() - now
+    return None
+
+
+def server_delay(response) -> Optional[float]:
+    """
+    How long the platform asked us to wait, if it said.
+    Reads Retry-After, the Twitter/Mastodon rate-limit reset headers when
+    the remaining quota is exhausted, and Telegram's parameters.retry_after.
+    """
+    if response is None:
+        return None
+    now = time.time()
+    headers = response.headers
+    if "Retry-After" in headers:
+        delay = _parse_reset(headers["Retry-After"], now)
+        if delay is not None:
+            return max(delay, 0.0)
+    for remaining, reset in (
+        ("x-rate-limit-remaining", "x-rate-limit-reset"),
+        ("X-RateLimit-Remaining", "X-RateLimit-Reset"),
+    ):
+        if headers.get(remaining) == "0" and reset in headers:
+            delay = _parse_reset(headers[reset], now)
+            if delay is not None:
+                return max(delay, 0.0)
+    if response.status_code == 429:
+        try:
+            return float(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            pass
+    return None
+
+
+def never_sent(error) -> bool:
+    """
+    Whether a request failed before the server could have seen it: a
+    connect timeout, or a connection that was refused or couldn't resolve.
+    A read timeout or a dropped connection may come after the post went out.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], "reason", error.args[0])
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def outcome_unknown(response, error, idempotent: bool) -> bool:
+    """
+    Whether a failed request may have posted anyway: no response although
+    the request may have been sent, or a 5xx other than 503. Platforms that
+    deduplicate by idempotency key can always be retried. error is None
+    when no request was made at all.
+    """
+    if idempotent:
+        return False
+    if response is None:
+        return error is not None and not never_sent(error)
+    return response.status_code >= 500 and response.status_code != 503
+
+
+def is_retryable(response) -> bool:
+    """429s and 5xxs, and requests that got no response."""
+    return (
+        response is None or response.status_code == 429 or response.status_code >= 500
+    )
+
+
+def backoff(attempts: int) -> float:
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempts))
+
+
+def _load(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _store(path: str, jobs: Dict):
+    """Write jobs to path, or delete it once there are none."""
+    if not jobs:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(jobs, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class Outbox:
+    """
+    Jobs persisted as {key: job} in OUTBOX_PATH. A job is
+    {key, file, platform, post_info, attempts, next_attempt_at, last_error,
+    posted_at}. Posted jobs stay until the ledger has them, so a crash
+    between posting and recording can't lead to a second post.
+    Parked jobs move to dead_path with a parked_at time and aren't queued
+    again while they are there.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH, dead_path: str = DEAD_LETTER_PATH):
+        self.path = path
+        self.dead_path = dead_path
+        self.jobs = _load(path)
+        self.dead = _load(dead_path)
+        # Jobs that ran out of attempts before parking existed
+        for key, job in list(self.jobs.items()):
+            if job["posted_at"] is None and job["attempts"] >= MAX_ATTEMPTS:
+                self.dead[key] = self.jobs.pop(key)
+
+    def save(self):
+        _store(self.path, self.jobs)
+        _store(self.dead_path, self.dead)
+
+    def enqueue(self, file_path: str, platform: str, post_info: Dict):
+        """Add a job, or refresh the post of an already queued one."""
+        key = job_key(file_path, platform)
+        if key in self.dead:
+            return
+        job = self.jobs.get(key)
+        if job is None:
+            self.jobs[key] = {
+                "key": key,
+                "file": file_path,
+                "platform": platform,
+                "post_info": post_info,
+                "attempts": 0,
+                "next_attempt_at": 0,
+                "last_error": None,
+                "posted_at": None,
+            }
+        else:
+            job["post_info"] = post_info
+
+    def discard_posted(self, ledger: Dict[str, Dict[str, str]]):
+        """Drop jobs, parked ones included, that the ledger already has."""
+        for jobs in (self.jobs, self.dead):
+            for key, job in list(jobs.items()):
+                if job["platform"] in ledger.get(job["file"], {}):
+                    del jobs[key]
+
+    def due(self, now: float = None) -> List[Dict]:
+        now = time.time() if now is None else now
+        return [
+            job
+            for job in self.jobs.values()
+            if job["posted_at"] is None and job["next_attempt_at"] <= now
+        ]
+
+    def posted(self) -> List[Dict]:
+        """Jobs posted but not yet in the ledger, from this run or a crashed one."""
+        return [job for job in self.jobs.values() if job["posted_at"] is not None]
+
+    def done(self, job: Dict):
+        job["posted_at"] = datetime.utcnow().isoformat()
+        self.save()
+
+    def failed(self, job: Dict, error: str, delay: float) -> Optional[float]:
+        """
+        Schedule a retry after delay seconds and return that time, or park
+        the job and return None if that was its last attempt.
+        """
+        job["attempts"] += 1
+        if job["attempts"] >= MAX_ATTEMPTS:
+            self.park(job, error)
+            return None
+        job["last_error"] = error
+        job["next_attempt_at"] = time.time() + delay
+        self.save()
+        return job["next_attempt_at"]
+
+    def park(self, job: Dict, error: str):
+        """Move a job to the dead-letter file, where nothing retries it."""
+        job["last_error"] = error
+        job["parked_at"] = datetime.utcnow().isoformat()
+        self.jobs.pop(job["key"], None)
+        self.dead[job["key"]] = job
+        self.save()
@@ -10,6 +10,9 @@ import json
 import requests
 from typing import Dict, List
 
+# Overridable to point at a stand-in server, e.g. bench/mock_social.py
+API_URL = os.environ.get("DEVTO_API_URL", "https://dev.to").rstrip("/")
+
 
 def read_markdown_content(file_path: str) -> str:
     """
@@ -90,18 +93,21 @@ def format_devto_article(post_info: Dict, file_path: str, mode: str = "link") ->
     return article
 
 
-def post_to_devto(api_key: str, article: Dict) -> bool:
+def post_to_devto(
+    api_key: str, article: Dict, session: requests.Session = None
+) -> bool:
     """
     Post an article to Dev.to using their API.
 
     Args:
         api_key: Dev.to API key
         article: Article payload
+        session: Optional session to reuse pooled connections
 
     Returns:
         True if successful, False otherwise
     """
-    url = "https://dev.to/api/articles"
+    url = f"{API_URL}/api/articles"
 
     headers = {"api-key": api_key, "Content-Type": "application/json"}
 
@@ -110,7 +116,9 @@ def post_to_devto(api_key: str, article: Dict) -> bool:
         print(f"Title: {article['article']['title']}", file=sys.stderr)
         print(f"Tags: {article['article']['tags']}", file=sys.stderr)
 
-        response = requests.post(url, json=article, headers=headers, timeout=30)
+        response = (session or requests).post(
+            url, json=article, headers=headers, timeout=30
+        )
 
         # Parse response
         try:
@@ -54,7 +54,13 @@ def format_mastodon_message(post_info: Dict) -> str:
     return post
 
 
-def post_to_mastodon(instance_url: str, access_token: str, message: str) -> bool:
+def post_to_mastodon(
+    instance_url: str,
+    access_token: str,
+    message: str,
+    session: requests.Session = None,
+    idempotency_key: str = None,
+) -> bool:
     """
     Post a status to Mastodon using the API.
 
@@ -62,6 +68,8 @@ def post_to_mastodon(instance_url: str, access_token: str, message: str) -> bool
         instance_url: Mastodon instance URL (e.g., https://mastodon.social)
         access_token: Mastodon access token
         message: Status text to post
+        session: Optional session to reuse pooled connections
+        idempotency_key: Optional key so a retried request can't post twice
 
     Returns:
         True if successful, False otherwise
@@ -75,6 +83,9 @@ def post_to_mastodon(instance_url: str, access_token: str, message: str) -> bool
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }
+    if idempotency_key:
+        # Mastodon ignores repeats of a key for an hour
+        headers["Idempotency-Key"] = idempotency_key
 
     payload = {
         "status": message,
@@ -85,7 +96,9 @@ def post_to_mastodon(instance_url: str, access_token: str, message: str) -> bool
         print(f"Posting to Mastodon ({instance_url})...", file=sys.stderr)
         print(f"Post length: {len(message)} characters", file=sys.stderr)
 
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = (session or requests).post(
+            url, json=payload, headers=headers, timeout=10
+        )
 
         # Parse response
         try:
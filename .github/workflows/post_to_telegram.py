@@ -10,6 +10,9 @@ import json
 import requests
 from typing import Dict, List
 
+# Overridable to point at a stand-in server, e.g. bench/mock_social.py
+API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
 
 def format_telegram_message(post_info: Dict) -> str:
     """
@@ -43,7 +46,9 @@ def format_telegram_message(post_info: Dict) -> str:
     return message
 
 
-def post_to_telegram(bot_token: str, channel_id: str, message: str) -> bool:
+def post_to_telegram(
+    bot_token: str, channel_id: str, message: str, session: requests.Session = None
+) -> bool:
     """
     Post a message to Telegram channel using Bot API.
 
@@ -51,11 +56,12 @@ def post_to_telegram(bot_token: str, channel_id: str, message: str) -> bool:
         bot_token: Telegram bot token from @BotFather
         channel_id: Channel ID (e.g., @your_channel or -1001234567890)
         message: Message text to send
+        session: Optional session to reuse pooled connections
 
     Returns:
         True if successful, False otherwise
     """
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = f"{API_URL}/bot{bot_token}/sendMessage"
 
     payload = {
         "chat_id": channel_id,
@@ -68,7 +74,7 @@ def post_to_telegram(bot_token: str, channel_id: str, message: str) -> bool:
         print(f"Posting to Telegram channel: {channel_id}", file=sys.stderr)
         print(f"Message length: {len(message)} characters", file=sys.stderr)
 
-        response = requests.post(url, json=payload, timeout=10)
+        response = (session or requests).post(url, json=payload, timeout=10)
 
         # Try to parse response even if status code is error
         try:
@@ -10,6 +10,9 @@ import json
 import requests
 from typing import Dict, List
 
+# Overridable to point at a stand-in server, e.g. bench/mock_social.py
+API_URL = os.environ.get("TWITTER_API_URL", "https://api.twitter.com").rstrip("/")
+
 
 def format_twitter_message(post_info: Dict, max_length: int = 280) -> str:
     """
@@ -72,6 +75,7 @@ def post_to_twitter_v2(
     api_key: str,
     api_secret: str,
     message: str,
+    session: requests.Session = None,
 ) -> bool:
     """
     Post a tweet using Twitter API v2 with OAuth 1.0a User Context.
@@ -83,13 +87,14 @@ def post_to_twitter_v2(
         api_key: OAuth 1.0a API Key (Consumer Key)
         api_secret: OAuth 1.0a API Secret (Consumer Secret)
         message: Tweet text to post
+        session: Optional session to reuse pooled connections
 
     Returns:
         True if successful, False otherwise
     """
     from requests_oauthlib import OAuth1
 
-    url = "https://api.twitter.com/2/tweets"
+    url = f"{API_URL}/2/tweets"
 
     # OAuth 1.0a authentication
     auth = OAuth1(api_key, api_secret, access_token, access_token_secret)
@@ -101,7 +106,7 @@ def post_to_twitter_v2(
         print(f"Tweet length: {len(message)} characters", file=sys.stderr)
         print(f"Tweet preview:\n{message}\n", file=sys.stderr)
 
-        response = requests.post(url, json=payload, auth=auth, timeout=10)
+        response = (session or requests).post(url, json=payload, auth=auth, timeout=10)
 
         # Parse response
         try:
@@ -0,0 +1,172 @@
+import os
+import re
+import hashlib
+import logging
+import mimetypes
+import threading
+import posixpath
+from functools import lru_cache
+from app.compression import SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+# Only these are ever served as static files
+ASSET_DIRS = ("styles", "scripts", "assets")
+ASSET_FILES = ()
+
+# Assets up to this size are held in memory with their precompressed variants
+MEMORY_LIMIT = 64 * 1024
+
+HTML_URL_RE = re.compile(r"""(\b(?:src|href)=)(["'])(/[^"'?#]+)\2""")
+CSS_URL_RE = re.compile(r"""url\(\s*(["']?)([^"')?#]+)\1\s*\)""")
+
+
+class Asset:
+    def __init__(self, path, file_path, body, digest, stat):
+        self.path = path
+        self.file_path = file_path
+        self.digest = digest
+        self.etag = f'"{digest[:32]}"'
+        self.size = len(body)
+        self.mtime = stat.st_mtime
+        self.media_type = (
+            mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        )
+        root, ext = posixpath.splitext(path)
+        self.url = f"{root}.{digest[:10]}{ext}"
+        self.body = body if self.size <= MEMORY_LIMIT else None
+        self.variants = {}
+
+
+class AssetManifest:
+    """Whitelisted static files, fingerprinted by content hash.
+
+    Every asset is reachable at its plain path and at a fingerprinted URL
+    (``/styles/main.<hash>.css``) that never changes content. Stylesheets are
+    fingerprinted after their url() references are rewritten, so a changed
+    image also changes the URL of every stylesheet that points at it.
+    """
+
+    def __init__(self, dirs=ASSET_DIRS, files=ASSET_FILES):
+        self.dirs = dirs
+        self.files = files
+        self.digest = None
+        self._by_path = {}
+        self._by_url = {}
+        self._lock = threading.Lock()
+
+    def _source_files(self):
+        for file_path in self.files:
+            if os.path.isfile(file_path):
+                yield file_path
+        for directory in self.dirs:
+            for root, _, names in os.walk(directory):
+                for name in sorted(names):
+                    if not name.endswith(tuple(SUFFIXES.values())):
+                        yield os.path.join(root, name)
+
+    def _load(self, path, sources, assets, loading):
+        if path in assets:
+            return assets[path]
+        file_path = sources[path]
+        if path in loading:
+            raise ValueError(f"Circular url() reference through {path}")
+        loading.add(path)
+
+        with open(file_path, "rb") as f:
+            source = f.read()
+        stat = os.stat(file_path)
+        body = source
+        if file_path.endswith(".css"):
+            body = self._rewrite_css(path, body, sources, assets, loading)
+        asset = Asset(path, file_path, body, hashlib.sha256(body).hexdigest(), stat)
+
+        # Precompressed siblings are only valid for an unmodified, older source
+        if asset.body is not None and body == source:
+            for encoding, suffix in SUFFIXES.items():
+                try:
+                    if os.stat(file_path + suffix).st_mtime_ns < stat.st_mtime_ns:
+                        continue
+                    with open(file_path + suffix, "rb") as f:
+                        asset.variants[encoding] = f.read()
+                except FileNotFoundError:
+                    pass
+
+        loading.discard(path)
+        assets[path] = asset
+        return asset
+
+    def _rewrite_css(self, path, body, sources, assets, loading):
+        base = posixpath.dirname(path)
+
+        def replace(match):
+            quote, ref = match.groups()
+            target = posixpath.normpath(posixpath.join(base, ref))
+            if (
+                ref.startswith(("data:", "http:", "https:", "//"))
+                or target not in sources
+            ):
+                return match.group(0)
+            url = self._load(target, sources, assets, loading).url
+            return f"url({quote}{url}{quote})"
+
+        return CSS_URL_RE.sub(replace, body.decode("utf-8")).encode("utf-8")
+
+    def refresh(self):
+        """Rescan the whitelisted files and recompute every fingerprint."""
+        with self._lock:
+            sources = {
+                "/" + file_path.replace(os.sep, "/"): file_path
+                for file_path in self._source_files()
+            }
+            assets = {}
+            for path in sorted(sources):
+                self._load(path, sources, assets, set())
+
+            digest = hashlib.sha256()
+            for path in sorted(assets):
+                digest.update(f"{path}:{assets[path].digest}\n".encode())
+
+            self._by_path = assets
+            self._by_url = {asset.url: asset for asset in assets.values()}
+            self.digest = digest.hexdigest()
+            _rewrite_html.cache_clear()
+            logger.info("Asset manifest loaded %d files", len(assets))
+
+    def _ensure_loaded(self):
+        if self.digest is None:
+            self.refresh()
+
+    def version(self):
+        self._ensure_loaded()
+        return self.digest
+
+    def lookup(self, path):
+        """Return (asset, fingerprinted) for a request path, or (None, False)."""
+        self._ensure_loaded()
+        asset = self._by_url.get(path)
+        if asset is not None:
+            return asset, True
+        return self._by_path.get(path), False
+
+    def url_for(self, path):
+        self._ensure_loaded()
+        asset = self._by_path.get(path)
+        return asset.url if asset is not None else path
+
+
+asset_manifest = AssetManifest()
+
+
+@lru_cache(maxsize=256)
+def _rewrite_html(html, digest):
+    def replace(match):
+        attr, quote, path = match.groups()
+        return f"{attr}{quote}{asset_manifest.url_for(path)}{quote}"
+
+    return HTML_URL_RE.sub(replace, html)
+
+
+def rewrite_asset_urls(html):
+    """Point src/href attributes at the fingerprinted URLs of known assets."""
+    return _rewrite_html(html, asset_manifest.version())
@@ -0,0 +1,84 @@
+"""
+Pre-renders every HTML route, plus the client-side search index, to disk
+so the server can skip rendering.
+
+Usage: python -m app.build [--out build]
+Then run the app with PRERENDER_DIR=build.
+"""
+
+import os
+import json
+import asyncio
+import argparse
+from app.posts import post_store
+from app.prerender import MANIFEST_NAME, variant_key, output_file
+from app.routes.pages import PAGE_PATHS, page_version, render_page
+from app.routes.blog import blog_post_version, render_blog_post
+from app.routes.search import build_search_index
+from app.search_index import build_artifact
+
+
+def write_page(out_dir, manifest, path, full, html, etag, last_modified):
+    file_name = output_file(path, full)
+    file_path = os.path.join(out_dir, file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    manifest[variant_key(path, full)] = {
+        "file": file_name,
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+
+
+async def build(out_dir):
+    post_store.refresh(force=True)
+    manifest = {}
+
+    for path in PAGE_PATHS:
+        for full in (False, True):
+            etag, last_modified = await page_version(path, full)
+            html = await render_page(path, full)
+            write_page(out_dir, manifest, path, full, html, etag, last_modified)
+
+    for post in post_store.posts():
+        # Only the post that owns a duplicated slug gets rendered
+        if post_store.get_post(post["slug"]) is not post:
+            continue
+        path = f"/blog/{post['slug']}"
+        for full in (False, True):
+            etag, last_modified = blog_post_version(post, full)
+            html = render_blog_post(post, full)
+            write_page(out_dir, manifest, path, full, html, etag, last_modified)
+
+    version, body = build_artifact(build_search_index(post_store.entries()))
+    search_index_file = os.path.join("search-index", f"{version}.json")
+    os.makedirs(os.path.join(out_dir, "search-index"), exist_ok=True)
+    with open(os.path.join(out_dir, search_index_file), "wb") as f:
+        f.write(body)
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": 1,
+                "pages": manifest,
+                "search_index": {"version": version, "file": search_index_file},
+            },
+            f,
+            indent=2,
+        )
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render every route to disk")
+    parser.add_argument("--out", default="build", help="Output directory")
+    args = parser.parse_args()
+
+    manifest = asyncio.run(build(args.out))
+    print(f"✓ Pre-rendered {len(manifest)} pages into {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Precompressed brotli/gzip responses.
+
+Static files get .br and .gz siblings written at build time that the asset
+server sends as-is; dynamic responses are compressed once per
+(ETag, encoding) and kept in a bounded in-memory cache. Streamed responses
+are compressed chunk by chunk with a flush after each, so every chunk
+reaches the client as soon as it is produced.
+
+Usage: python -m app.compression [PATH ...]   (writes .br/.gz siblings)
+"""
+
+import os
+import gzip
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+import anyio
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from app.conditional import encoded_etag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".html",
+    ".css",
+    ".js",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".json",
+)
+MIN_SIZE = 256
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+DEFAULT_PATHS = [
+    "index.html",
+    "pages",
+    "styles",
+    "scripts",
+    "assets",
+]
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding):
+    """Pick the best encoding we can produce from an Accept-Encoding header."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, best=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 6)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """Incremental compressor whose every chunk can be decoded on arrival."""
+
+    def __init__(self, encoding):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=6)
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        self.encoding = encoding
+
+    def compress(self, data):
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionCache:
+    """Bounded LRU of compressed bodies keyed by (ETag, encoding)."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def peek(self, etag, encoding):
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+            return compressed
+
+    def put(self, etag, encoding, compressed):
+        key = (etag, encoding)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._bytes += len(compressed)
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get(self, etag, encoding, body):
+        compressed = self.peek(etag, encoding)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            self.put(etag, encoding, compressed)
+        return compressed
+
+
+compression_cache = CompressionCache()
+
+
+def add_vary(headers, value):
+    vary = headers.get("Vary")
+    if not vary:
+        headers["Vary"] = value
+    elif value.lower() not in (v.strip().lower() for v in vary.split(",")):
+        headers["Vary"] = f"{vary}, {value}"
+
+
+async def compressed_response(request: Request, content, headers, media_type):
+    """Send content compressed for the client, reusing earlier compressions.
+
+    headers must carry the response's ETag, which keys the cache.
+    """
+    body = content.encode("utf-8") if isinstance(content, str) else content
+    headers = dict(headers)
+    add_vary(headers, "Accept-Encoding")
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    # Small bodies are compressed too: the ETag names the coding, and a 304
+    # has to send it without having the body to measure
+    if encoding is None:
+        return Response(content=body, headers=headers, media_type=media_type)
+
+    etag = headers["ETag"]
+    body = await anyio.to_thread.run_sync(compression_cache.get, etag, encoding, body)
+    headers["ETag"] = encoded_etag(etag, encoding)
+    headers["Content-Encoding"] = encoding
+    return Response(content=body, headers=headers, media_type=media_type)
+
+
+async def streaming_response(request: Request, chunks, headers, media_type):
+    """Stream an async iterable of str/bytes chunks, compressed for the client.
+
+    headers must carry the ETag of the complete response. The compressed
+    stream is cached under it once finished, so later requests for the same
+    ETag are answered in one piece without rendering anything.
+    """
+    headers = dict(headers)
+    add_vary(headers, "Accept-Encoding")
+    encoding = negotiate(request.headers.get("accept-encoding"))
+
+    if encoding is None:
+
+        async def plain():
+            async for chunk in chunks:
+                yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+        return StreamingResponse(plain(), headers=headers, media_type=media_type)
+
+    etag = headers["ETag"]
+    headers["ETag"] = encoded_etag(etag, encoding)
+    headers["Content-Encoding"] = encoding
+    cached = compression_cache.peek(etag, encoding)
+    if cached is not None:
+        await chunks.aclose()
+        return Response(content=cached, headers=headers, media_type=media_type)
+
+    async def compressed():
+        compressor = StreamCompressor(encoding)
+        parts = []
+        async for chunk in chunks:
+            data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+            data = await anyio.to_thread.run_sync(compressor.compress, data)
+            parts.append(data)
+            yield data
+        parts.append(compressor.finish())
+        yield parts[-1]
+        compression_cache.put(etag, encoding, b"".join(parts))
+
+    return StreamingResponse(compressed(), headers=headers, media_type=media_type)
+
+
+def precompress_file(file_path):
+    """Write .br/.gz siblings of file_path; returns how many were (re)written."""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    if len(data) < MIN_SIZE:
+        return 0
+    mtime = os.stat(file_path).st_mtime_ns
+    written = 0
+    for encoding in supported_encodings():
+        target = file_path + SUFFIXES[encoding]
+        if os.path.exists(target) and os.stat(target).st_mtime_ns >= mtime:
+            continue
+        compressed = compress(data, encoding, best=True)
+        if len(compressed) >= len(data):
+            continue
+        with open(target, "wb") as f:
+            f.write(compressed)
+        written += 1
+    return written
+
+
+def precompress_paths(paths):
+    written = 0
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+            ]
+        for file_path in files:
+            if file_path.endswith(COMPRESSIBLE_EXTENSIONS):
+                written += precompress_file(file_path)
+    return written
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Write .br/.gz siblings of static files"
+    )
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed, writing gzip variants only")
+    written = precompress_paths([p for p in args.paths if os.path.exists(p)])
+    print(f"✓ Wrote {written} precompressed file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import re
+import glob
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+
+ENCODED_ETAG_RE = re.compile(r'-(?:br|gzip)"$')
+
+
+def _code_version():
+    digest = hashlib.sha256()
+    for file_path in sorted(glob.glob("app/**/*.py", recursive=True)):
+        with open(file_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# The rendering code is an input of every response too, so a deploy that
+# changes it has to change every ETag
+CODE_VERSION = _code_version()
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the versions of everything a response depends on."""
+    key = "\0".join(str(p) for p in (CODE_VERSION,) + parts)
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def encoded_etag(etag, encoding):
+    """Strong ETags must differ between content-codings of a response."""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def is_not_modified(request: Request, etag, last_modified=None):
+    """Evaluate If-None-Match, then If-Modified-Since, as RFC 9110 orders them."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        # Weak comparison is the rule for If-None-Match, and any content-coding
+        # of the same response counts as a match
+        tags = [
+            ENCODED_ETAG_RE.sub('"', t[2:] if t.startswith("W/") else t) for t in tags
+        ]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+# Pages are a fragment or a full document depending on HX-Request, and are
+# compressed per Accept-Encoding; 304s must carry the same Vary as the 200
+PAGE_VARY = "HX-Request, Accept-Encoding"
+
+
+def validator_headers(etag, last_modified=None, vary=None):
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified_response(etag, last_modified=None, vary=None, encoding=None):
+    """304 with the validators the 200 would carry; encoding is the
+    content-coding the 200 would be sent in, which its ETag names."""
+    if encoding:
+        etag = encoded_etag(etag, encoding)
+    return Response(
+        status_code=304, headers=validator_headers(etag, last_modified, vary)
+    )
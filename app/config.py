@@ -1,5 +1,14 @@
+import os
 import logging
 
+# Directory written by `python -m app.build`; when set, pages are served from
+# it and only rendered live if missing from the build
+PRERENDER_DIR = os.environ.get("PRERENDER_DIR", "")
+
+# Invalidate caches from filesystem events instead of stat checks; set to 0
+# where the content never changes at runtime
+WATCH_FILES = os.environ.get("WATCH_FILES", "1") != "0"
+
 
 def setup_logging():
     logging.basicConfig(
@@ -0,0 +1,339 @@
+"""
+Atom, RSS and JSON Feed generation.
+
+Every post is serialized once into a feed entry for each format, and the
+feeds are assembled by splicing those entries into the feed headers, so
+rebuilding after an edit only serializes the changed posts. The app builds
+and serves the feeds from memory (app/routes/feeds.py);
+.github/workflows/generate_feeds.py writes the same feeds to disk, with a
+persistent entry cache, for use outside the app.
+
+The subscription feeds carry only the newest entries. Older entries are
+split into RFC 5005 archive documents of a fixed size, counted from the
+oldest post, so an archive page never changes once it is full. Archive
+URLs carry a hash of their content and each page links to the one before
+it with rel="prev-archive".
+"""
+
+import os
+import json
+import hashlib
+import posixpath
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+DOMAIN = "https://mlship.dev"
+TITLE = "Egor's personal blog"
+SUBTITLE = "Thoughts on software, technology, and life"
+AUTHOR = "Egor Kosaretsky"
+AUTHOR_EMAIL = "egor@kosaretsky.co.uk (Egor Kosaretsky)"
+
+# Bump when the serialized entries change, to invalidate persisted entries
+FEED_FORMAT = 2
+
+# Entries in the subscription feeds (up to ARCHIVE_PAGE_SIZE - 1 more are
+# kept until a full archive page can be cut) and per archive page
+FEED_ENTRY_LIMIT = int(os.environ.get("FEED_ENTRY_LIMIT", 20))
+ARCHIVE_PAGE_SIZE = int(os.environ.get("FEED_ARCHIVE_PAGE_SIZE", 50))
+# Leave the full post HTML out of the feeds, keeping only the excerpt
+SUMMARY_ONLY = os.environ.get("FEED_SUMMARY_ONLY", "0") == "1"
+
+ARCHIVE_DIR = "feed-archive"
+FH_NAMESPACE = "http://purl.org/syndication/history/1.0"
+
+FEEDS = {
+    "atom.xml": "application/atom+xml",
+    "rss.xml": "application/rss+xml",
+    "feed.json": "application/feed+json",
+}
+
+
+def parse_date(value):
+    """Parse a post date. Unquoted YAML dates load as datetime.date (or
+    datetime), so the value is normalised like app/posts.py does."""
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+
+
+def feed_entry(post, summary_only=SUMMARY_ONLY):
+    """Serialize a post into its entry for every feed format.
+
+    Raises ValueError if the post's date can't be parsed.
+    """
+    return {
+        "date": parse_date(post["date"]).strftime("%Y-%m-%d"),
+        "atom": atom_entry(post, summary_only),
+        "rss": rss_item(post, summary_only),
+        "json": json_item(post, summary_only),
+    }
+
+
+def atom_entry(post, summary_only=False):
+    entry = ET.Element("entry")
+
+    # Required entry elements
+    ET.SubElement(entry, "title").text = post["title"]
+    ET.SubElement(entry, "id").text = f"{DOMAIN}/blog/{post['slug']}"
+
+    # Link to the post
+    ET.SubElement(
+        entry,
+        "link",
+        href=f"{DOMAIN}/blog/{post['slug']}",
+        rel="alternate",
+        type="text/html",
+    )
+
+    # Updated timestamp in proper ISO 8601 format (no microseconds)
+    post_date = parse_date(post["date"])
+    ET.SubElement(entry, "updated").text = post_date.strftime("%Y-%m-%dT12:00:00Z")
+    ET.SubElement(entry, "published").text = post_date.strftime("%Y-%m-%dT12:00:00Z")
+
+    # Author (can be per-entry or inherited from feed)
+    entry_author = ET.SubElement(entry, "author")
+    ET.SubElement(entry_author, "name").text = AUTHOR
+
+    # Summary (plain text excerpt)
+    if post.get("excerpt"):
+        ET.SubElement(entry, "summary", type="text").text = post["excerpt"]
+
+    # Content (HTML)
+    if not summary_only:
+        content = ET.SubElement(entry, "content", type="html")
+        content.text = post.get("content", "")
+    return ET.tostring(entry, encoding="unicode", method="xml")
+
+
+def rss_item(post, summary_only=False):
+    item = ET.Element("item")
+
+    # Required item elements
+    ET.SubElement(item, "title").text = post["title"]
+    ET.SubElement(item, "link").text = f"{DOMAIN}/blog/{post['slug']}"
+    ET.SubElement(item, "guid", isPermaLink="true").text = (
+        f"{DOMAIN}/blog/{post['slug']}"
+    )
+
+    # Description (plain text or HTML)
+    if post.get("excerpt"):
+        ET.SubElement(item, "description").text = post["excerpt"]
+
+    # Full content using content:encoded (the prefix is declared on <rss>, so
+    # items serialize on their own)
+    if not summary_only:
+        ET.SubElement(item, "content:encoded").text = post.get("content", "")
+
+    # Publication date in RFC 822 format
+    post_date = parse_date(post["date"])
+    pub_date = post_date.strftime("%a, %d %b %Y %H:%M:%S +0000")
+    ET.SubElement(item, "pubDate").text = pub_date
+
+    # Author
+    ET.SubElement(item, "author").text = AUTHOR_EMAIL
+    return ET.tostring(item, encoding="unicode", method="xml")
+
+
+def json_item(post, summary_only=False):
+    post_date = parse_date(post["date"])
+    item = {
+        "id": f"{DOMAIN}/blog/{post['slug']}",
+        "url": f"{DOMAIN}/blog/{post['slug']}",
+        "title": post["title"],
+        "date_published": post_date.strftime("%Y-%m-%dT12:00:00Z"),
+    }
+    if summary_only:
+        # JSON Feed items need some content
+        item["content_text"] = post.get("excerpt") or post["title"]
+    else:
+        item["content_html"] = post.get("content", "")
+    if post.get("excerpt"):
+        item["summary"] = post["excerpt"]
+    return item
+
+
+def with_entries(root, entries, parent_tag=None):
+    """Serialize root and splice pre-serialized entries in before it closes."""
+    xml = ET.tostring(root, encoding="unicode", method="xml")
+    closing = f"</{root.tag}>"
+    if parent_tag:
+        closing = f"</{parent_tag}>{closing}"
+    head = xml[: -len(closing)]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n' + head + "".join(entries) + closing
+    )
+
+
+def build_atom_feed(entries, name="atom.xml", prev_archive=None, current=None):
+    """Build the Atom 1.0 feed, or one of its archive pages if current is set"""
+    # Create Atom feed with proper namespace
+    atom = ET.Element("feed", xmlns="http://www.w3.org/2005/Atom")
+    if current:
+        atom.set("xmlns:fh", FH_NAMESPACE)
+        ET.SubElement(atom, "fh:archive")
+
+    # Add required feed elements
+    ET.SubElement(atom, "title").text = TITLE
+    ET.SubElement(atom, "id").text = f"{DOMAIN}/"
+
+    # Add both link types (alternate and self)
+    ET.SubElement(atom, "link", href=DOMAIN, rel="alternate", type="text/html")
+    # Self link should point to exactly where this feed is served
+    if name:
+        ET.SubElement(
+            atom,
+            "link",
+            href=f"{DOMAIN}/{name}",
+            rel="self",
+            type="application/atom+xml",
+        )
+    # RFC 5005 links to the subscription feed and the next older archive
+    if current:
+        ET.SubElement(atom, "link", href=f"{DOMAIN}/{current}", rel="current")
+    if prev_archive:
+        ET.SubElement(atom, "link", href=f"{DOMAIN}/{prev_archive}", rel="prev-archive")
+
+    # Add updated timestamp (use most recent post date or current time)
+    if entries:
+        most_recent = parse_date(entries[0]["date"])
+        # Use noon UTC for consistency
+        updated_time = most_recent.strftime("%Y-%m-%dT12:00:00Z")
+    else:
+        # Use current date at noon UTC
+        updated_time = datetime.utcnow().strftime("%Y-%m-%dT12:00:00Z")
+    ET.SubElement(atom, "updated").text = updated_time
+
+    # Add author
+    author = ET.SubElement(atom, "author")
+    ET.SubElement(author, "name").text = AUTHOR
+
+    # Add subtitle (optional but recommended)
+    ET.SubElement(atom, "subtitle").text = SUBTITLE
+
+    return with_entries(atom, [e["atom"] for e in entries])
+
+
+def build_rss_feed(entries, name="rss.xml", prev_archive=None, current=None):
+    """Build the RSS 2.0 feed, or one of its archive pages if current is set"""
+    # Create RSS feed with proper namespace
+    rss = ET.Element("rss", version="2.0")
+    rss.set("xmlns:atom", "http://www.w3.org/2005/Atom")
+    rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
+    if current:
+        rss.set("xmlns:fh", FH_NAMESPACE)
+
+    channel = ET.SubElement(rss, "channel")
+    if current:
+        ET.SubElement(channel, "fh:archive")
+
+    # Required channel elements
+    ET.SubElement(channel, "title").text = TITLE
+    ET.SubElement(channel, "link").text = DOMAIN
+    ET.SubElement(channel, "description").text = SUBTITLE
+
+    # Add atom:link for feed autodiscovery
+    if name:
+        ET.SubElement(
+            channel,
+            "atom:link",
+            href=f"{DOMAIN}/{name}",
+            rel="self",
+            type="application/rss+xml",
+        )
+    # RFC 5005 links to the subscription feed and the next older archive
+    if current:
+        ET.SubElement(channel, "atom:link", href=f"{DOMAIN}/{current}", rel="current")
+    if prev_archive:
+        ET.SubElement(
+            channel, "atom:link", href=f"{DOMAIN}/{prev_archive}", rel="prev-archive"
+        )
+
+    # Optional but recommended channel elements
+    ET.SubElement(channel, "language").text = "en-us"
+    ET.SubElement(channel, "managingEditor").text = AUTHOR_EMAIL
+    ET.SubElement(channel, "webMaster").text = AUTHOR_EMAIL
+
+    # Add last build date
+    if entries:
+        most_recent = parse_date(entries[0]["date"])
+        last_build = most_recent.strftime("%a, %d %b %Y %H:%M:%S +0000")
+    else:
+        last_build = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S +0000")
+    ET.SubElement(channel, "lastBuildDate").text = last_build
+    ET.SubElement(channel, "pubDate").text = last_build
+
+    return with_entries(rss, [e["rss"] for e in entries], parent_tag="channel")
+
+
+def build_json_feed(entries, name="feed.json", prev_archive=None, current=None):
+    """Build the JSON Feed 1.1, or one of its archive pages if current is set"""
+    feed = {
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": TITLE,
+        "home_page_url": DOMAIN,
+        "description": SUBTITLE,
+        "authors": [{"name": AUTHOR}],
+        "language": "en-US",
+    }
+    if name:
+        feed["feed_url"] = f"{DOMAIN}/{name}"
+    # JSON Feed pagination: next_url points at older items
+    if prev_archive:
+        feed["next_url"] = f"{DOMAIN}/{prev_archive}"
+    feed["items"] = [e["json"] for e in entries]
+    return json.dumps(feed, ensure_ascii=False, indent=2)
+
+
+FEED_BUILDERS = {
+    "atom.xml": build_atom_feed,
+    "rss.xml": build_rss_feed,
+    "feed.json": build_json_feed,
+}
+
+
+def split_archives(entries, limit=FEED_ENTRY_LIMIT, page_size=ARCHIVE_PAGE_SIZE):
+    """Split newest-first entries into (current entries, full archive pages).
+
+    Pages are counted from the oldest entry and listed oldest first, each
+    newest first, so adding posts never changes an existing page.
+    """
+    archived = max(len(entries) - limit, 0) // page_size * page_size
+    oldest_first = entries[::-1]
+    pages = [
+        oldest_first[start : start + page_size][::-1]
+        for start in range(0, archived, page_size)
+    ]
+    return entries[: len(entries) - archived], pages
+
+
+def archive_name(feed_name, number, body):
+    root, ext = posixpath.splitext(feed_name)
+    digest = hashlib.sha256(body).hexdigest()[:10]
+    return f"{ARCHIVE_DIR}/{root}-{number}.{digest}{ext}"
+
+
+def media_type(name):
+    """Media type of a feed or archive page, by the feed it belongs to."""
+    if name.endswith(".json"):
+        return FEEDS["feed.json"]
+    if posixpath.basename(name).startswith("atom"):
+        return FEEDS["atom.xml"]
+    return FEEDS["rss.xml"]
+
+
+def build_feeds(entries, limit=FEED_ENTRY_LIMIT, page_size=ARCHIVE_PAGE_SIZE):
+    """Return {feed name: bytes} for entries sorted newest first.
+
+    Names are paths relative to the site root: the subscription feeds plus
+    their archive pages under ARCHIVE_DIR.
+    """
+    current, pages = split_archives(entries, limit, page_size)
+    feeds = {}
+    for feed_name, build in FEED_BUILDERS.items():
+        prev_archive = None
+        for number, page in enumerate(pages, 1):
+            # The URL hashes everything but the self link, which contains it
+            unnamed = build(page, None, prev_archive, feed_name).encode("utf-8")
+            name = archive_name(feed_name, number, unnamed)
+            feeds[name] = build(page, name, prev_archive, feed_name).encode("utf-8")
+            prev_archive = name
+        feeds[feed_name] = build(current, feed_name, prev_archive).encode("utf-8")
+    return feeds
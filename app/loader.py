@@ -0,0 +1,114 @@
+"""
+Bulk loading of blog posts across a process pool.
+
+Parsing a post renders its markdown, which is CPU-bound and holds the GIL,
+so large batches (a cold start, a full rebuild) are split into chunks and
+parsed in worker processes. Small batches are parsed in-process, where
+starting a pool would cost more than it saves.
+
+Usage: python -m app.loader [PATTERN]   (parses the corpus, prints a summary)
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.utils import hash_file, parse_markdown_file
+from app.render_cache import render_cache
+
+logger = logging.getLogger(__name__)
+
+# Batches smaller than this are parsed in-process
+MIN_PARALLEL = 32
+WORKERS = int(os.environ.get("LOADER_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def _load_one(file_path, parse):
+    try:
+        return {
+            "file": file_path,
+            "digest": hash_file(file_path),
+            "post": parse(file_path),
+        }, None
+    except Exception as e:
+        return None, {"file": file_path, "error": type(e).__name__, "message": str(e)}
+
+
+def _load_chunk(file_paths, parse):
+    hits, misses = render_cache.hits, render_cache.misses
+    results = [_load_one(file_path, parse) for file_path in file_paths]
+    return results, (render_cache.hits - hits, render_cache.misses - misses)
+
+
+def _chunks(items, size):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def load_posts(file_paths, parse=parse_markdown_file, workers=None):
+    """Parse file_paths, in parallel for large batches.
+
+    parse must be a module-level function so it can be sent to workers.
+    Returns (loaded, errors): loaded holds {file, digest, post} dicts and
+    errors holds {file, error, message} dicts, both in input order.
+    """
+    file_paths = list(file_paths)
+    workers = min(workers or WORKERS, len(file_paths) or 1)
+
+    if workers <= 1 or len(file_paths) < MIN_PARALLEL:
+        results, _ = _load_chunk(file_paths, parse)
+    else:
+        # Several chunks per worker even out uneven post sizes
+        size = max(1, len(file_paths) // (workers * 4))
+        # Workers are spawned, not forked, as callers may have threads running
+        context = multiprocessing.get_context("spawn")
+        results = []
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_load_chunk, chunk, parse)
+                for chunk in _chunks(file_paths, size)
+            ]
+            for future in futures:
+                chunk_results, (hits, misses) = future.result()
+                results.extend(chunk_results)
+                render_cache.hits += hits
+                render_cache.misses += misses
+
+    loaded = [result for result, _ in results if result is not None]
+    errors = [error for _, error in results if error is not None]
+    for error in errors:
+        logger.error(
+            "Error parsing blog post %s: %s: %s",
+            error["file"],
+            error["error"],
+            error["message"],
+        )
+    return loaded, errors
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse every blog post")
+    parser.add_argument("pattern", nargs="?", default="blog_posts/*.md")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    loaded, errors = load_posts(glob.glob(args.pattern), workers=args.workers)
+    print(
+        json.dumps(
+            {
+                "loaded": len(loaded),
+                "errors": errors,
+                "seconds": round(time.perf_counter() - started, 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
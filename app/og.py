@@ -0,0 +1,281 @@
+"""
+Open Graph preview images for blog posts.
+
+The layout is shared by .github/workflows/generate_og_images.py, which
+renders every post at deploy time, and the /og/{slug}.png route, which
+renders a post's image on first request and keeps it in a bounded disk
+cache. cairosvg is optional: without it the favicon is left out.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import textwrap
+import threading
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFont
+from app.utils import file_cache, hash_file
+
+try:
+    import cairosvg
+except (ImportError, OSError):
+    # OSError: cairosvg is installed but the cairo library is missing
+    cairosvg = None
+
+logger = logging.getLogger(__name__)
+
+TITLE_FONT = ("assets/opengraph/fonts/UbuntuMono-Bold.ttf", 60)
+DESCRIPTION_FONT = ("assets/opengraph/fonts/UbuntuMono-Regular.ttf", 30)
+ICON_PATH = "assets/index/favicon.svg"
+ICON_SIZE = 100  # Adjust this value to change the size of the icon
+
+# Every image is written in each of these formats, next to each other
+FORMATS = {
+    ".png": {"format": "PNG", "optimize": True},
+    ".webp": {"format": "WEBP", "quality": 90, "method": 6},
+}
+
+# Where CI renders every post's images before the container is built, with
+# a "slug<TAB>text key" line per image (not .json, which .dockerignore drops)
+PREBUILT_DIR = "assets/opengraph/images"
+PREBUILT_KEYS = os.path.join(PREBUILT_DIR, "keys.txt")
+
+CACHE_DIR = os.environ.get("OG_CACHE_DIR", ".cache/og/images")
+MAX_BYTES = int(os.environ.get("OG_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Fonts and the rasterized icon, loaded once per process
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def load_resources():
+    global _resources
+    with _resources_lock:
+        if _resources is None:
+            title_font = ImageFont.truetype(*TITLE_FONT)
+            description_font = ImageFont.truetype(*DESCRIPTION_FONT)
+            icon = None
+            if cairosvg is not None:
+                png_data = cairosvg.svg2png(
+                    url=ICON_PATH, output_width=ICON_SIZE, output_height=ICON_SIZE
+                )
+                icon = Image.open(BytesIO(png_data))
+                icon.load()
+            else:
+                logger.warning("cairosvg is unavailable, OG images have no icon")
+            _resources = (title_font, description_font, icon)
+    return _resources
+
+
+def render_og_image(title, description):
+    width, height = 1200, 630
+    background_color = "#1e1e2e"  # Catppuccin Mocha Base
+    title_color = "#cdd6f4"  # Catppuccin Mocha Text
+    description_color = "#a6adc8"  # Catppuccin Mocha Subtext0
+
+    image = Image.new("RGB", (width, height), color=background_color)
+    draw = ImageDraw.Draw(image)
+
+    title_font, description_font, icon = load_resources()
+
+    # Paste the SVG icon
+    if icon is not None:
+        image.paste(icon, (20, 20), icon)  # 20,20 is the position. Adjust as needed.
+
+    # Draw title
+    title_wrapped = textwrap.wrap(title, width=30)
+    y_text = 50
+    for line in title_wrapped:
+        bbox = title_font.getbbox(line)
+        line_width = bbox[2] - bbox[0]
+        line_height = bbox[3] - bbox[1]
+        draw.text(
+            ((width - line_width) / 2, y_text), line, font=title_font, fill=title_color
+        )
+        y_text += line_height
+
+    # Draw description
+    description_wrapped = textwrap.wrap(description, width=60)
+    y_text = 300
+    for line in description_wrapped[:4]:  # Limit to 4 lines
+        bbox = description_font.getbbox(line)
+        line_width = bbox[2] - bbox[0]
+        line_height = bbox[3] - bbox[1]
+        draw.text(
+            ((width - line_width) / 2, y_text),
+            line,
+            font=description_font,
+            fill=description_color,
+        )
+        y_text += line_height
+
+    return image
+
+
+def generate_og_image(title, description, output_path):
+    """Render the image for a post and save it in every format in FORMATS.
+
+    output_path is the .png path; the other formats are written next to it.
+    """
+    image = render_og_image(title, description)
+
+    # Ensure the directory exists
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    # Save the image
+    root, _ = os.path.splitext(output_path)
+    for ext, options in FORMATS.items():
+        image.save(root + ext, **options)
+
+
+_template_digest = None
+
+
+def template_digest():
+    """Hash of everything besides the post that goes into an image.
+
+    This module is included so a layout change re-renders every image.
+    """
+    global _template_digest
+    if _template_digest is None:
+        digest = hashlib.sha256()
+        for path in (__file__, TITLE_FONT[0], DESCRIPTION_FONT[0], ICON_PATH):
+            digest.update(hash_file(path).encode())
+        digest.update(b"icon" if cairosvg is not None else b"no icon")
+        _template_digest = digest.hexdigest()
+    return _template_digest
+
+
+def image_key(title, description):
+    data = json.dumps([template_digest(), title, description, sorted(FORMATS)])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def text_key(title, description):
+    """Hash of the post text in an image.
+
+    Unlike image_key() it leaves out the template, which differs between CI
+    (with cairosvg) and the server (without); CI re-renders every image on
+    a template change anyway.
+    """
+    data = json.dumps([title, description])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def parse_prebuilt_keys(data):
+    keys = {}
+    for line in data.decode("utf-8").splitlines():
+        slug, _, key = line.partition("\t")
+        if key:
+            keys[slug] = key
+    return keys
+
+
+def write_prebuilt_keys(keys):
+    """Write {slug: text key} for the images in PREBUILT_DIR."""
+    tmp_path = f"{PREBUILT_KEYS}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for slug, key in sorted(keys.items()):
+            f.write(f"{slug}\t{key}\n")
+    os.replace(tmp_path, PREBUILT_KEYS)
+
+
+# (digest, {slug: text key}) of PREBUILT_KEYS, reparsed when it changes
+_prebuilt_keys = (None, {})
+
+
+def prebuilt_keys():
+    global _prebuilt_keys
+    try:
+        entry = file_cache.get(PREBUILT_KEYS)
+    except OSError:
+        return {}
+    if entry["digest"] != _prebuilt_keys[0]:
+        _prebuilt_keys = (entry["digest"], parse_prebuilt_keys(entry["content"]))
+    return _prebuilt_keys[1]
+
+
+def prebuilt_image_path(slug, title, description):
+    """Path of the CI-built PNG for slug if it shows this title and
+    description, else None."""
+    if prebuilt_keys().get(slug) != text_key(title, description):
+        return None
+    path = os.path.join(PREBUILT_DIR, f"{slug}.png")
+    return path if os.path.exists(path) else None
+
+
+class OGImageCache:
+    """Bounded on-disk cache of rendered PNGs, keyed by image_key()."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._written = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def get(self, title, description):
+        """Return (key, PNG bytes), rendering the image if it isn't cached."""
+        key = image_key(title, description)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            self.hits += 1
+            # Entries are evicted oldest-mtime first, so a hit refreshes it
+            os.utime(path)
+            return key, data
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        buffer = BytesIO()
+        render_og_image(title, description).save(buffer, **FORMATS[".png"])
+        data = buffer.getvalue()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("OG image cache write failed for %s: %s", path, e)
+            return key, data
+
+        with self._lock:
+            self._written += len(data)
+            if self._written > self.max_bytes // 10:
+                self._written = 0
+                self.evict()
+        return key, data
+
+    def evict(self):
+        """Delete least recently used images until the cache fits max_bytes."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.evictions += 1
+
+
+og_image_cache = OGImageCache(CACHE_DIR, MAX_BYTES)
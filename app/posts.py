@@ -0,0 +1,228 @@
+import os
+import glob
+import json
+import time
+import base64
+import bisect
+import logging
+import hashlib
+import threading
+from datetime import datetime, timezone
+from collections import OrderedDict
+from app.loader import load_posts
+
+logger = logging.getLogger(__name__)
+
+
+class PostStore:
+    """Process-wide cache of parsed and rendered blog posts.
+
+    Every markdown file is parsed once and kept in memory together with the
+    (mtime, size) it was parsed at. A refresh re-stats the corpus and only
+    re-parses files whose stat changed, so serving a post never touches
+    markdown or YAML unless the source was edited.
+
+    Posts are indexed by slug for constant-time lookups, and recently missed
+    slugs are remembered for a short time so repeated probes for unknown
+    posts don't trigger refreshes. Pages of the date-sorted listing are
+    addressed by opaque cursors naming the last post of the previous page,
+    so a page costs the same however many posts come before it.
+    """
+
+    def __init__(
+        self,
+        pattern="blog_posts/*.md",
+        check_interval=1.0,
+        miss_ttl=30.0,
+        max_misses=1024,
+    ):
+        self.pattern = pattern
+        self.check_interval = check_interval
+        self.miss_ttl = miss_ttl
+        self.max_misses = max_misses
+        self._files = {}
+        self._entries = []
+        self._posts = []
+        self._keys = []
+        self._by_slug = {}
+        self._versions = {}
+        self._misses = OrderedDict()
+        self.digest = hashlib.sha256().hexdigest()
+        self.last_modified = 0.0
+        self._last_check = None
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        return (
+            self._last_check is None
+            or time.monotonic() - self._last_check >= self.check_interval
+        )
+
+    def refresh(self, force=False):
+        """Re-stat the corpus and re-parse files that changed on disk."""
+        with self._lock:
+            if not force and not self.is_stale():
+                return
+            started = time.monotonic()
+
+            stats = {}
+            seen = set()
+            for file_path in glob.glob(self.pattern):
+                seen.add(file_path)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                entry = self._files.get(file_path)
+                if entry is None or entry["signature"] != (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                ):
+                    stats[file_path] = stat
+
+            # A cold start or a bulk edit fans out across worker processes
+            loaded, _ = load_posts(stats)
+            loaded = {result["file"]: result for result in loaded}
+            for file_path, stat in stats.items():
+                result = loaded.get(file_path, {})
+                self._files[file_path] = {
+                    "signature": (stat.st_mtime_ns, stat.st_size),
+                    "mtime": stat.st_mtime,
+                    "digest": result.get("digest"),
+                    "post": result.get("post"),
+                }
+
+            removed = set(self._files) - seen
+            for file_path in removed:
+                del self._files[file_path]
+
+            if stats or removed:
+                self._rebuild()
+            # Only now, so concurrent readers wait on the lock for a cold load
+            # instead of seeing an empty store
+            self._last_check = started
+
+    def _rebuild(self):
+        entries = [
+            (file_path, e["post"])
+            for file_path, e in self._files.items()
+            if e["post"] is not None
+        ]
+        entries.sort(key=lambda x: _sort_key(x[1]), reverse=True)
+
+        corpus = hashlib.sha256()
+        for file_path in sorted(self._files):
+            corpus.update(f"{file_path}:{self._files[file_path]['digest']}\n".encode())
+
+        by_slug = {}
+        versions = {}
+        sources = {}
+        for file_path, post in entries:
+            slug = post.get("slug")
+            if slug in by_slug:
+                # Newest post wins, matching the old first-match lookup
+                logger.warning(
+                    "Duplicate slug %r in %s, already used by %s",
+                    slug,
+                    file_path,
+                    sources[slug],
+                )
+                continue
+            by_slug[slug] = post
+            sources[slug] = file_path
+            entry = self._files[file_path]
+            versions[slug] = (
+                entry["digest"],
+                max(entry["mtime"], _date_timestamp(post.get("date"))),
+            )
+
+        self._entries = entries
+        self._posts = [post for _, post in entries]
+        self._keys = [_sort_key(post) for post in reversed(self._posts)]
+        self._by_slug = by_slug
+        self._versions = versions
+        self.digest = corpus.hexdigest()
+        self.last_modified = max((v[1] for v in versions.values()), default=0.0)
+        self._misses.clear()
+        logger.info("Post store loaded %d blog posts", len(self._posts))
+
+    def posts(self):
+        """Return all posts sorted by date, newest first."""
+        return self._posts
+
+    def entries(self):
+        """Return (file path, post) pairs sorted by date, newest first."""
+        return self._entries
+
+    def page(self, cursor=None, limit=20):
+        """Return (posts, next cursor) for the page following cursor.
+
+        The next cursor is None on the last page. Raises ValueError for a
+        cursor that wasn't produced by this method.
+        """
+        posts = self._posts
+        if cursor is None:
+            start = 0
+        else:
+            # _keys is ascending, so the posts older than the cursor are the
+            # ones left of it, and they end the newest-first list
+            start = len(posts) - bisect.bisect_left(self._keys, decode_cursor(cursor))
+        page = posts[start : start + limit]
+        if start + limit >= len(posts):
+            return page, None
+        return page, encode_cursor(_sort_key(page[-1]))
+
+    def is_missing(self, slug):
+        """Whether slug recently missed and hasn't expired from the miss cache."""
+        expires = self._misses.get(slug)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            self._misses.pop(slug, None)
+            return False
+        return True
+
+    def version(self, slug):
+        """Return (source digest, last-modified timestamp) for a known slug."""
+        return self._versions[slug]
+
+    def get_post(self, slug):
+        """Return the post for slug, or None (remembering the miss)."""
+        post = self._by_slug.get(slug)
+        if post is None:
+            self._misses[slug] = time.monotonic() + self.miss_ttl
+            self._misses.move_to_end(slug)
+            while len(self._misses) > self.max_misses:
+                self._misses.popitem(last=False)
+        return post
+
+
+def _sort_key(post):
+    return str(post.get("date")), str(post.get("slug"))
+
+
+def encode_cursor(key):
+    data = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, slug = json.loads(data)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(date, str) or not isinstance(slug, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return date, slug
+
+
+def _date_timestamp(value):
+    try:
+        date = datetime.strptime(str(value), "%Y-%m-%d")
+    except ValueError:
+        return 0.0
+    return date.replace(tzinfo=timezone.utc).timestamp()
+
+
+post_store = PostStore()
@@ -0,0 +1,105 @@
+import os
+import json
+import asyncio
+import logging
+from fastapi import Request
+from app.config import PRERENDER_DIR
+from app.utils import read_file
+from app.conditional import (
+    PAGE_VARY,
+    is_not_modified,
+    validator_headers,
+    not_modified_response,
+)
+from app.compression import compressed_response, negotiate
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def variant_key(path, full):
+    return f"{'full' if full else 'fragment'}:{path}"
+
+
+def output_file(path, full):
+    name = "index" if path == "/" else path.strip("/")
+    return os.path.join("full" if full else "fragment", f"{name}.html")
+
+
+class PrerenderedSite:
+    """Pages written by ``python -m app.build``, served without rendering."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._manifest = None
+
+    def _load_manifest(self):
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+            logger.info(
+                "Serving %d pre-rendered pages from %s",
+                len(self._manifest["pages"]),
+                self.directory,
+            )
+        except FileNotFoundError:
+            logger.warning("No pre-render manifest at %s", manifest_path)
+            self._manifest = {"pages": {}}
+
+    async def _read(self, file_name):
+        try:
+            return await asyncio.to_thread(
+                read_file, os.path.join(self.directory, file_name)
+            )
+        except FileNotFoundError:
+            return None
+
+    async def get(self, path, full):
+        """Return the prebuilt entry for a route variant, or None to render live."""
+        if not self.directory:
+            return None
+        if self._manifest is None:
+            self._load_manifest()
+        entry = self._manifest["pages"].get(variant_key(path, full))
+        if entry is None:
+            return None
+        body = await self._read(entry["file"])
+        if body is None:
+            return None
+        return {**entry, "body": body}
+
+    async def search_index(self):
+        """Return the prebuilt (version, body) search index artifact, or None."""
+        if not self.directory:
+            return None
+        if self._manifest is None:
+            self._load_manifest()
+        entry = self._manifest.get("search_index")
+        if entry is None:
+            return None
+        body = await self._read(entry["file"])
+        if body is None:
+            return None
+        return entry["version"], body
+
+
+async def prerendered_response(request: Request, prebuilt):
+    etag, last_modified = prebuilt["etag"], prebuilt["last_modified"]
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(
+            etag,
+            last_modified,
+            vary=PAGE_VARY,
+            encoding=negotiate(request.headers.get("accept-encoding")),
+        )
+    return await compressed_response(
+        request,
+        prebuilt["body"],
+        validator_headers(etag, last_modified, vary=PAGE_VARY),
+        media_type="text/html",
+    )
+
+
+prerendered = PrerenderedSite(PRERENDER_DIR)
@@ -0,0 +1,152 @@
+"""
+Content-addressed on-disk cache of rendered markdown.
+
+Entries are keyed by a hash of the markdown source, the markdown extension
+config and the markdown library version, so the server and the workflow
+scripts share renders and only changed posts are rendered after a restart.
+
+Usage: python -m app.render_cache [--clear]   (prints cache statistics)
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import markdown
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_EXTENSIONS = ["fenced_code"]
+CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", ".cache/markdown")
+MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+class RenderCache:
+    def __init__(self, directory, max_bytes, extensions):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extensions = list(extensions)
+        self._config = json.dumps(
+            {"markdown": markdown.__version__, "extensions": self.extensions},
+            sort_keys=True,
+        )
+        self._written = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text):
+        digest = hashlib.sha256(self._config.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.html")
+
+    def render(self, text):
+        """Render markdown to HTML, reusing a cached render of identical input."""
+        path = self._path(self.key(text))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+            self.hits += 1
+            # Entries are evicted oldest-mtime first, so a hit refreshes it
+            os.utime(path)
+            return html
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Render cache read failed for %s: %s", path, e)
+
+        self.misses += 1
+        html = markdown.markdown(text, extensions=self.extensions)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Render cache write failed for %s: %s", path, e)
+            return html
+
+        with self._lock:
+            self._written += len(html)
+            if self._written > self.max_bytes // 10:
+                self._written = 0
+                self.evict()
+        return html
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".html"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "directory": self.directory,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+render_cache = RenderCache(CACHE_DIR, MAX_BYTES, MARKDOWN_EXTENSIONS)
+
+
+def render_markdown(text):
+    return render_cache.render(text)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Markdown render cache statistics")
+    parser.add_argument("--clear", action="store_true", help="Delete every entry")
+    args = parser.parse_args()
+
+    if args.clear:
+        render_cache.clear()
+    print(json.dumps(render_cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
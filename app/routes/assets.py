@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import Response, FileResponse
+from app.assets import asset_manifest
+from app.conditional import http_date, is_not_modified
+from app.compression import (
+    COMPRESSIBLE_EXTENSIONS,
+    add_vary,
+    compressed_response,
+    encoded_etag,
+    negotiate,
+)
+
+router = APIRouter()
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+async def serve_asset(request: Request, path: str):
+    """Serve whitelisted static files; fingerprinted URLs are cached forever"""
+    asset, fingerprinted = asset_manifest.lookup(f"/{path}")
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    headers = {
+        "ETag": asset.etag,
+        "Last-Modified": http_date(asset.mtime),
+        "Cache-Control": IMMUTABLE if fingerprinted else "public, max-age=3600",
+    }
+    compressible = asset.body is not None and asset.file_path.endswith(
+        COMPRESSIBLE_EXTENSIONS
+    )
+    encoding = None
+    if compressible:
+        add_vary(headers, "Accept-Encoding")
+        encoding = negotiate(request.headers.get("accept-encoding"))
+    if is_not_modified(request, asset.etag, asset.mtime):
+        # Same validators as the 200, which names its coding in the ETag
+        if encoding:
+            headers["ETag"] = encoded_etag(asset.etag, encoding)
+        return Response(status_code=304, headers=headers)
+
+    if asset.body is None:
+        return FileResponse(
+            asset.file_path, media_type=asset.media_type, headers=headers
+        )
+    if not compressible:
+        return Response(
+            content=asset.body, media_type=asset.media_type, headers=headers
+        )
+
+    if encoding in asset.variants:
+        headers["ETag"] = encoded_etag(asset.etag, encoding)
+        headers["Content-Encoding"] = encoding
+        return Response(
+            content=asset.variants[encoding],
+            media_type=asset.media_type,
+            headers=headers,
+        )
+    return await compressed_response(request, asset.body, headers, asset.media_type)
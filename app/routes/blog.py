@@ -1,31 +1,74 @@
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
-from bs4 import BeautifulSoup
+from fastapi import APIRouter, Request, HTTPException, Query
+from fastapi.responses import HTMLResponse, JSONResponse
 import asyncio
-import glob
-from app.utils import read_file, parse_markdown_file, generate_blog_html
+from typing import Optional
+from app.utils import read_file, generate_blog_html
+from app.og import image_key
+from app.posts import post_store
+from app.templates import index_shell
+from app.prerender import prerendered, prerendered_response
+from app.compression import compressed_response, negotiate, streaming_response
+from app.conditional import (
+    PAGE_VARY,
+    make_etag,
+    is_not_modified,
+    validator_headers,
+    not_modified_response,
+)
 
 router = APIRouter()
 
+# Posts per page of the /blog listing and (by default) of the JSON API
+BLOG_PAGE_SIZE = 10
+API_PAGE_SIZE = 20
+MAX_API_PAGE_SIZE = 100
+
 
 async def get_blog_posts():
-    blog_posts = []
-    blog_post_files = glob.glob("blog_posts/*.md")
-    for file_path in blog_post_files:
-        try:
-            post = await asyncio.to_thread(parse_markdown_file, file_path)
-            blog_posts.append(post)
-        except Exception as e:
-            print(f"Error parsing blog post {file_path}: {str(e)}")
-    return sorted(blog_posts, key=lambda x: x["date"], reverse=True)
+    if post_store.is_stale():
+        await asyncio.to_thread(post_store.refresh)
+    return post_store.posts()
 
 
-@router.get("/blog/{slug}", response_class=HTMLResponse)
-async def serve_blog_post(request: Request, slug: str):
-    posts = await get_blog_posts()
-    post = next((p for p in posts if p["slug"] == slug), None)
-    if post:
-        blog_post_content = f"""
+async def get_blog_post(slug):
+    if post_store.is_missing(slug):
+        return None
+    await get_blog_posts()
+    return post_store.get_post(slug)
+
+
+async def get_blog_page(cursor, limit):
+    await get_blog_posts()
+    try:
+        return post_store.page(cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def blog_post_version(post, full):
+    """Return (etag, last_modified) for a post's fragment or full page."""
+    digest, last_modified = post_store.version(post["slug"])
+    if not full:
+        return make_etag("fragment", digest), last_modified
+    shell_digest, shell_mtime = index_shell.version()
+    return make_etag("full", digest, shell_digest), max(last_modified, shell_mtime)
+
+
+def blog_post_meta(post):
+    slug = post["slug"]
+    # Versioned so crawlers refetch the image when the title or excerpt changes
+    version = image_key(post["title"], post.get("excerpt", ""))[:10]
+    return {
+        "og:title": post["title"],
+        "og:description": post.get("excerpt", ""),
+        "og:image": f"https://mlship.dev/og/{slug}.png?v={version}",
+        "og:url": f"https://mlship.dev/blog/{slug}",
+        "og:type": "article",
+    }
+
+
+def render_blog_post(post, full):
+    blog_post_content = f"""
         <article class="blog-post">
             <div class="post-header">
                 <button id="copyLinkBtn" class="copy-link-btn" onclick="copyPostLink('{post["slug"]}')">
@@ -53,77 +96,98 @@ async def serve_blog_post(request: Request, slug: str):
         </script>
         """
 
-        if request.headers.get("HX-Request"):
-            return HTMLResponse(content=blog_post_content)
-        else:
-            with open("index.html", "r") as file:
-                template = file.read()
-            soup = BeautifulSoup(template, "html.parser")
-
-            # Update OG meta tags
-            soup.find("meta", property="og:title")["content"] = post["title"]
-            soup.find("meta", property="og:description")["content"] = post.get(
-                "excerpt", ""
-            )
-            soup.find("meta", property="og:image")["content"] = (
-                f"https://mlship.dev/assets/opengraph/images/{slug}.png"
-            )
-            soup.find("meta", property="og:url")["content"] = (
-                f"https://mlship.dev/blog/{slug}"
-            )
-            soup.find("meta", property="og:type")["content"] = "article"
+    if not full:
+        return blog_post_content
+    return index_shell.render(
+        {**blog_post_meta(post), "main-content": blog_post_content}
+    )
 
-            main_content = soup.find(id="main-content")
-            if main_content:
-                main_content.clear()
-                main_content.append(BeautifulSoup(blog_post_content, "html.parser"))
-
-            return HTMLResponse(content=str(soup))
-    else:
-        raise HTTPException(status_code=404, detail="Not Found")
 
+async def stream_blog_post(post):
+    """Yield the shell's <head>, with the post's meta tags, before the post."""
+    head, tail = index_shell.split("main-content", blog_post_meta(post))
+    yield head
+    yield render_blog_post(post, full=False)
+    yield tail
 
-@router.get("/api/blog-posts")
-async def serve_blog_posts():
-    posts = await get_blog_posts()
-    return [{k: v for k, v in post.items() if k != "content"} for post in posts]
 
+@router.get("/blog/{slug}", response_class=HTMLResponse)
+async def serve_blog_post(request: Request, slug: str):
+    full = not request.headers.get("HX-Request")
+    prebuilt = await prerendered.get(request.url.path, full)
+    if prebuilt:
+        return await prerendered_response(request, prebuilt)
 
-@router.get("/atom.xml")
-async def serve_atom_feed():
-    """Serve the pregenerated atom.xml file"""
-    try:
-        return FileResponse(
-            "atom.xml",
-            media_type="application/atom+xml",
-            headers={"Cache-Control": "public, max-age=3600"},  # Cache for 1 hour
+    post = await get_blog_post(slug)
+    if post:
+        etag, last_modified = blog_post_version(post, full)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(
+                etag,
+                last_modified,
+                vary=PAGE_VARY,
+                encoding=negotiate(request.headers.get("accept-encoding")),
+            )
+        headers = validator_headers(etag, last_modified, vary=PAGE_VARY)
+        if full:
+            return await streaming_response(
+                request, stream_blog_post(post), headers, media_type="text/html"
+            )
+        return await compressed_response(
+            request, render_blog_post(post, full), headers, media_type="text/html"
         )
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Atom feed not found")
+    else:
+        raise HTTPException(status_code=404, detail="Not Found")
 
 
-@router.get("/rss.xml")
-async def serve_rss_feed():
-    """Serve the pregenerated rss.xml file"""
-    try:
-        return FileResponse(
-            "rss.xml",
-            media_type="application/rss+xml",
-            headers={"Cache-Control": "public, max-age=3600"},  # Cache for 1 hour
+@router.get("/api/blog-posts")
+async def serve_blog_posts(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(API_PAGE_SIZE, ge=1, le=MAX_API_PAGE_SIZE),
+):
+    """One page of post metadata; the next page is linked from the Link header"""
+    posts, next_cursor = await get_blog_page(cursor, limit)
+    etag = make_etag("api", post_store.digest, cursor, limit)
+    last_modified = post_store.last_modified
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(
+            etag,
+            last_modified,
+            vary="Accept-Encoding",
+            encoding=negotiate(request.headers.get("accept-encoding")),
         )
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="RSS feed not found")
-
 
-@router.get("/feed")
-@router.get("/feed.xml")
-async def serve_default_feed():
-    """Redirect common feed URLs to RSS feed"""
-    try:
-        return FileResponse(
-            "rss.xml",
-            media_type="application/rss+xml",
-            headers={"Cache-Control": "public, max-age=3600"},
+    headers = validator_headers(etag, last_modified)
+    if next_cursor:
+        next_url = f"{request.url.path}?cursor={next_cursor}&limit={limit}"
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return await compressed_response(
+        request,
+        JSONResponse(
+            [{k: v for k, v in post.items() if k != "content"} for post in posts]
+        ).body,
+        headers,
+        media_type="application/json",
+    )
+
+
+@router.get("/blog-posts", response_class=HTMLResponse)
+async def serve_blog_listing(request: Request, cursor: Optional[str] = None):
+    """HTMX fragment with the next page of the /blog listing"""
+    posts, next_cursor = await get_blog_page(cursor, BLOG_PAGE_SIZE)
+    etag = make_etag("listing", post_store.digest, cursor)
+    last_modified = post_store.last_modified
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(
+            etag,
+            last_modified,
+            vary="Accept-Encoding",
+            encoding=negotiate(request.headers.get("accept-encoding")),
         )
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Feed not found")
+    return await compressed_response(
+        request,
+        generate_blog_html(posts, next_cursor),
+        validator_headers(etag, last_modified),
+        media_type="text/html",
+    )
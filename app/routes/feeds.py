@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import Response
+import asyncio
+import hashlib
+import logging
+import threading
+from app.posts import post_store
+from app.routes.blog import get_blog_posts
+from app.feeds import ARCHIVE_DIR, build_feeds, feed_entry, media_type
+from app.compression import (
+    MIN_SIZE,
+    compress,
+    encoded_etag,
+    negotiate,
+    supported_encodings,
+)
+from app.conditional import make_etag, is_not_modified, validator_headers
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class FeedSet:
+    """Keeps the feeds, precompressed, in step with the post store.
+
+    The feeds are rebuilt when the store's corpus digest changes, and feed
+    entries are reused for every post the store didn't re-parse.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._feeds = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _build(self):
+        entries = {}
+        for file_path, post in post_store.entries():
+            cached = self._entries.get(file_path)
+            # The store keeps the same post object until its file changes
+            if cached is None or cached[0] is not post:
+                try:
+                    cached = (post, feed_entry(post))
+                except (KeyError, ValueError) as e:
+                    # One bad post shouldn't take every feed down
+                    logger.error("Skipping %s in the feeds: %r", file_path, e)
+                    continue
+            entries[file_path] = cached
+        self._entries = entries
+
+        feeds = {}
+        for name, body in build_feeds([e for _, e in entries.values()]).items():
+            previous = self._feeds.get(name)
+            # Archive pages rarely change, so keep their compressed variants
+            if previous is not None and previous["body"] == body:
+                feeds[name] = previous
+                continue
+            variants = {}
+            if len(body) >= MIN_SIZE:
+                for encoding in supported_encodings():
+                    variants[encoding] = compress(body, encoding, best=True)
+            feeds[name] = {
+                "body": body,
+                "etag": make_etag("feed", name, hashlib.sha256(body).hexdigest()),
+                "last_modified": post_store.last_modified,
+                "variants": variants,
+            }
+        logger.info("Built feeds with %d entries", len(entries))
+        return feeds
+
+    def _rebuild(self, key):
+        with self._lock:
+            if key != self._key:
+                self._feeds = self._build()
+                self._key = key
+
+    async def get(self, name):
+        """Return {body, etag, last_modified, variants} for a feed, or None."""
+        await get_blog_posts()
+        key = post_store.digest
+        if key != self._key:
+            await asyncio.to_thread(self._rebuild, key)
+        return self._feeds.get(name)
+
+
+feed_set = FeedSet()
+
+
+async def serve_feed(request: Request, name, cache_control):
+    feed = await feed_set.get(name)
+    if feed is None:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    etag, last_modified = feed["etag"], feed["last_modified"]
+    headers = validator_headers(etag, last_modified, vary="Accept-Encoding")
+    headers["Cache-Control"] = cache_control
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding in feed["variants"]:
+        headers["ETag"] = encoded_etag(etag, encoding)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    body = feed["body"]
+    if encoding in feed["variants"]:
+        body = feed["variants"][encoding]
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, headers=headers, media_type=media_type(name))
+
+
+# Readers revalidate after an hour, which is a cheap 304 until a new post
+FEED_CACHE_CONTROL = "public, max-age=3600"
+
+
+@router.get("/atom.xml")
+async def serve_atom_feed(request: Request):
+    return await serve_feed(request, "atom.xml", FEED_CACHE_CONTROL)
+
+
+@router.get("/rss.xml")
+@router.get("/feed")
+@router.get("/feed.xml")
+async def serve_rss_feed(request: Request):
+    return await serve_feed(request, "rss.xml", FEED_CACHE_CONTROL)
+
+
+@router.get("/feed.json")
+async def serve_json_feed(request: Request):
+    return await serve_feed(request, "feed.json", FEED_CACHE_CONTROL)
+
+
+@router.get(f"/{ARCHIVE_DIR}/{{name}}")
+async def serve_feed_archive(request: Request, name: str):
+    """Archive pages are named by their content hash, so they never change"""
+    return await serve_feed(
+        request, f"{ARCHIVE_DIR}/{name}", "public, max-age=31536000, immutable"
+    )
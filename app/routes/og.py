@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import Response
+import asyncio
+from app.og import image_key, og_image_cache, prebuilt_image_path
+from app.routes.blog import get_blog_post
+from app.utils import file_cache
+from app.conditional import make_etag, is_not_modified
+
+router = APIRouter()
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Renders in progress, keyed by image key, so concurrent requests for an
+# uncached image share one render
+_pending = {}
+
+
+async def get_og_image(title, description):
+    """Return (key, PNG bytes), rendering off the event loop on a cache miss."""
+    key = image_key(title, description)
+    task = _pending.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            asyncio.to_thread(og_image_cache.get, title, description)
+        )
+        _pending[key] = task
+        task.add_done_callback(lambda _: _pending.pop(key, None))
+    # Shielded so one client disconnecting doesn't cancel the others' render
+    return await asyncio.shield(task)
+
+
+@router.get("/og/{slug}.png")
+async def serve_og_image(request: Request, slug: str, v: str = ""):
+    """Open Graph image for a post: the one CI built if it shows the current
+    title and excerpt, otherwise rendered on first request"""
+    post = await get_blog_post(slug)
+    if not post:
+        raise HTTPException(status_code=404, detail="Blog post not found")
+
+    title, description = post["title"], post.get("excerpt", "")
+    key = image_key(title, description)
+    # Only the versioned URL from the page's meta tags is content-addressed
+    cache_control = IMMUTABLE if v == key[:10] else "public, max-age=3600"
+
+    # The production image has no cairosvg, so CI's renders (with the icon)
+    # are preferred; runtime rendering covers posts added since the build
+    prebuilt = await asyncio.to_thread(prebuilt_image_path, slug, title, description)
+    if prebuilt:
+        entry = await asyncio.to_thread(file_cache.get, prebuilt)
+        etag = make_etag("og", entry["digest"])
+    else:
+        etag = make_etag("og", key)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if prebuilt:
+        image = entry["content"]
+    else:
+        _, image = await get_og_image(title, description)
+    return Response(content=image, media_type="image/png", headers=headers)
@@ -1,13 +1,73 @@
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import HTMLResponse
-from bs4 import BeautifulSoup
 import asyncio
-from app.utils import read_file, generate_blog_html
-from app.routes.blog import get_blog_posts
+from app.utils import read_file, file_version, generate_blog_html
+from app.routes.blog import BLOG_PAGE_SIZE, get_blog_posts
+from app.posts import post_store
+from app.templates import index_shell, blog_page
+from app.assets import asset_manifest, rewrite_asset_urls
+from app.prerender import prerendered, prerendered_response
+from app.compression import compressed_response, negotiate, streaming_response
+from app.conditional import (
+    PAGE_VARY,
+    make_etag,
+    is_not_modified,
+    validator_headers,
+    not_modified_response,
+)
 
 router = APIRouter()
 
 
+PAGE_PATHS = ("/", "/home", "/about", "/projects", "/contact", "/blog")
+
+
+def page_file(path):
+    return "pages/home.html" if path == "/" else f"pages{path}.html"
+
+
+async def page_version(path, full):
+    """Return (etag, last_modified) for a page's fragment or full variant."""
+    if path == "/blog":
+        await get_blog_posts()
+        digest, last_modified = blog_page.version()
+        sources = [digest, post_store.digest]
+        last_modified = max(last_modified, post_store.last_modified)
+    else:
+        digest, last_modified = await asyncio.to_thread(file_version, page_file(path))
+        sources = [digest, asset_manifest.version()]
+
+    if not full:
+        return make_etag("fragment", path, *sources), last_modified
+    shell_digest, shell_mtime = index_shell.version()
+    etag = make_etag("full", path, shell_digest, *sources)
+    return etag, max(last_modified, shell_mtime)
+
+
+async def render_page(path, full):
+    if path == "/blog":
+        await get_blog_posts()
+        posts, next_cursor = post_store.page(limit=BLOG_PAGE_SIZE)
+        content = blog_page.render(
+            {"blog-posts": generate_blog_html(posts, next_cursor)}
+        )
+    else:
+        content = await asyncio.to_thread(read_file, page_file(path))
+        content = rewrite_asset_urls(content.decode("utf-8"))
+
+    if not full:
+        return content
+    return index_shell.render({"main-content": content})
+
+
+async def stream_page(path):
+    """Yield the shell's <head> before the page content is rendered."""
+    head, tail = index_shell.split("main-content")
+    yield head
+    yield await render_page(path, full=False)
+    yield tail
+
+
 @router.get("/", response_class=HTMLResponse)
 @router.get("/home", response_class=HTMLResponse)
 @router.get("/about", response_class=HTMLResponse)
@@ -17,34 +77,27 @@ router = APIRouter()
 async def serve_page(request: Request):
     path = request.url.path
     try:
-        is_htmx_request = request.headers.get("HX-Request")
-        content_file = "pages/home.html" if path == "/" else f"pages{path}.html"
-
-        content = await asyncio.to_thread(read_file, content_file)
-        content = content.decode("utf-8")
-
-        if path == "/blog":
-            posts = await get_blog_posts()
-            blog_content = generate_blog_html(posts)
-            soup = BeautifulSoup(content, "html.parser")
-            blog_posts_div = soup.find(id="blog-posts")
-            if blog_posts_div:
-                blog_posts_div.clear()
-                blog_posts_div.append(BeautifulSoup(blog_content, "html.parser"))
-            content = str(soup)
-
-        if is_htmx_request:
-            return HTMLResponse(content=content)
-        else:
-            index_html = await asyncio.to_thread(read_file, "index.html")
-            index_html = index_html.decode("utf-8")
-
-            soup = BeautifulSoup(index_html, "html.parser")
-            main_content = soup.find(id="main-content")
-            if main_content:
-                main_content.clear()
-                main_content.append(BeautifulSoup(content, "html.parser"))
-
-            return HTMLResponse(content=str(soup))
+        full = not request.headers.get("HX-Request")
+        prebuilt = await prerendered.get(path, full)
+        if prebuilt:
+            return await prerendered_response(request, prebuilt)
+
+        etag, last_modified = await page_version(path, full)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(
+                etag,
+                last_modified,
+                vary=PAGE_VARY,
+                encoding=negotiate(request.headers.get("accept-encoding")),
+            )
+
+        headers = validator_headers(etag, last_modified, vary=PAGE_VARY)
+        if full:
+            return await streaming_response(
+                request, stream_page(path), headers, media_type="text/html"
+            )
+        return await compressed_response(
+            request, await render_page(path, full), headers, media_type="text/html"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
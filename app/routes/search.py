@@ -1,52 +1,200 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse
 from bs4 import BeautifulSoup
 import asyncio
 import os
-import glob
-from app.utils import read_file, parse_markdown_file
+import logging
+import threading
+from collections import OrderedDict
+from app.utils import read_file, file_version
+from app.posts import post_store
+from app.routes.blog import get_blog_posts
+from app.search_index import (
+    ARTIFACT_FORMAT,
+    SearchIndex,
+    build_artifact,
+    make_snippet,
+    parse_query,
+)
+from app.prerender import prerendered
+from app.compression import compressed_response
+from app.conditional import (
+    make_etag,
+    is_not_modified,
+    validator_headers,
+    not_modified_response,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+SEARCH_PAGES = {
+    "pages/home.html": "/home",
+    "pages/about.html": "/about",
+    "pages/projects.html": "/projects",
+    "pages/contact.html": "/contact",
+}
+SEARCH_TAGS = ["p", "h1", "h2", "h3", "h4", "h5", "h6"]
+
+
+def build_search_index(entries):
+    """Index every searchable page element and every post's title and text."""
+    index = SearchIndex()
+
+    for file, path in SEARCH_PAGES.items():
+        try:
+            content = read_file(file).decode("utf-8")
+        except Exception as e:
+            logger.error("Error indexing file %s: %s", file, e)
+            continue
+        soup = BeautifulSoup(content, "html.parser")
+        for element_index, element in enumerate(soup.find_all(SEARCH_TAGS)):
+            index.add(
+                "page",
+                element.text,
+                {
+                    "file": file,
+                    "path": path,
+                    "elementIndex": element_index,
+                    "tagName": element.name,
+                },
+            )
+
+    for file_path, post in entries:
+        text = BeautifulSoup(post["content"], "html.parser").get_text(" ")
+        index.add(
+            "blog",
+            f"{post['title']}\n{text}",
+            {
+                "file": os.path.basename(file_path),
+                "path": f"/blog/{post['slug']}",
+                "title": post["title"],
+            },
+        )
+
+    return index.finalize()
+
+
+class SiteSearch:
+    """Keeps the search index in step with the pages and the post store."""
+
+    def __init__(self, max_results=256):
+        self._key = None
+        self._index = SearchIndex().finalize()
+        self._artifact = None
+        self._lock = threading.Lock()
+        # LRU of result lists keyed by (index version, parsed query, kinds)
+        self.max_results = max_results
+        self._results = OrderedDict()
+
+    def _current_key(self):
+        """Post store digest and page digests; stats files, so call it off
+        the event loop. Unreadable pages are left out, as in the index."""
+        key = [post_store.digest]
+        for file in SEARCH_PAGES:
+            try:
+                key.append(file_version(file)[0])
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def _rebuild(self, key):
+        with self._lock:
+            if key != self._key:
+                index = build_search_index(post_store.entries())
+                index.version = key
+                self._index = index
+                self._key = key
+
+    async def index(self):
+        await get_blog_posts()
+        key = await asyncio.to_thread(self._current_key)
+        if key != self._key:
+            await asyncio.to_thread(self._rebuild, key)
+        return self._index
+
+    async def artifact(self):
+        """Return (version, JSON bytes) of the client-side index artifact."""
+        prebuilt = await prerendered.search_index()
+        if prebuilt:
+            return prebuilt
+        index = await self.index()
+        if self._artifact is None or self._artifact[0] is not index:
+            self._artifact = (index, await asyncio.to_thread(build_artifact, index))
+        return self._artifact[1]
+
+    async def search(self, term, kinds):
+        index = await self.index()
+        terms, phrases = parse_query(term)
+        key = (
+            index.version,
+            tuple(terms),
+            tuple(map(tuple, phrases)),
+            tuple(sorted(kinds)),
+        )
+        results = self._results.get(key)
+        if results is not None:
+            self._results.move_to_end(key)
+            return results
+
+        results = []
+        for _, doc, needles in index.search(term, kinds=kinds):
+            results.append(
+                {**doc["fields"], "excerpt": make_snippet(doc["text"], needles)}
+            )
+        self._results[key] = results
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+        return results
+
+
+site_search = SiteSearch()
+
+
+@router.get("/search-index.json")
+async def serve_search_index_manifest(request: Request):
+    """Point clients at the current immutable search index artifact"""
+    version, _ = await site_search.artifact()
+    etag = make_etag("search-index", version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    return JSONResponse(
+        content={
+            "format": ARTIFACT_FORMAT,
+            "version": version,
+            "url": f"/search-index/{version}.json",
+        },
+        headers=validator_headers(etag),
+    )
+
+
+@router.get("/search-index/{version}.json")
+async def serve_search_index(request: Request, version: str):
+    current, body = await site_search.artifact()
+    if version != current:
+        raise HTTPException(status_code=404, detail="Search index not found")
+    return await compressed_response(
+        request,
+        body,
+        {
+            "ETag": f'"{version}"',
+            "Cache-Control": "public, max-age=31536000, immutable",
+        },
+        media_type="application/json",
+    )
+
 
 @router.get("/search")
 async def handle_search(request: Request, term: str, page: str = "all"):
     search_term = term.lower()
-    search_results = []
 
+    kinds = set()
     if page == "all" or page != "blog":
-        html_files = {
-            "pages/home.html": "/home",
-            "pages/about.html": "/about",
-            "pages/projects.html": "/projects",
-            "pages/contact.html": "/contact",
-        }
-
-        for file, path in html_files.items():
-            try:
-                content = await asyncio.to_thread(read_file, file)
-                content = content.decode("utf-8")
-                soup = BeautifulSoup(content, "html.parser")
-
-                elements = soup.find_all(["p", "h1", "h2", "h3", "h4", "h5", "h6"])
-
-                for index, element in enumerate(elements):
-                    if search_term in element.text.lower():
-                        excerpt = element.text[:100] + "..."
-                        search_results.append(
-                            {
-                                "file": file,
-                                "path": path,
-                                "excerpt": excerpt,
-                                "elementIndex": index,
-                                "tagName": element.name,
-                            }
-                        )
-            except Exception as e:
-                print(f"Error searching file {file}: {str(e)}")
-
+        kinds.add("page")
     if page == "all" or page == "blog":
-        blog_results = await search_blog_posts(search_term)
-        search_results.extend(blog_results)
+        kinds.add("blog")
+    search_results = await site_search.search(search_term, kinds)
 
     return {"results": search_results, "searchTerm": search_term}
 
@@ -58,26 +206,4 @@ async def handle_blog_search(term: str):
 
 
 async def search_blog_posts(search_term):
-    search_results = []
-    blog_post_files = glob.glob("blog_posts/*.md")
-
-    for file_path in blog_post_files:
-        try:
-            post = await asyncio.to_thread(parse_markdown_file, file_path)
-            if (
-                search_term in post["content"].lower()
-                or search_term in post["title"].lower()
-            ):
-                excerpt = post["content"][:200] + "..."
-                search_results.append(
-                    {
-                        "file": os.path.basename(file_path),
-                        "path": f"/blog/{post['slug']}",
-                        "excerpt": excerpt,
-                        "title": post["title"],
-                    }
-                )
-        except Exception as e:
-            print(f"Error searching blog post {file_path}: {str(e)}")
-
-    return search_results
+    return await site_search.search(search_term, {"blog"})
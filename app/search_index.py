@@ -0,0 +1,193 @@
+import re
+import json
+import math
+import hashlib
+import heapq
+import bisect
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+SNIPPET_RADIUS = 80
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text)]
+
+
+def parse_query(query):
+    """Split a query into bare terms and quoted phrases (each a list of terms)."""
+    terms, phrases = [], []
+    for phrase, word in QUERY_RE.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) == 1:
+                terms.extend(tokens)
+            elif tokens:
+                phrases.append(tokens)
+        else:
+            terms.extend(tokenize(word))
+    return terms, phrases
+
+
+def make_snippet(text, needles, radius=SNIPPET_RADIUS):
+    """Plain-text excerpt of text centred on the first occurrence of a needle."""
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(n) for n in needles if n) if p >= 0]
+    if not positions:
+        start, end = 0, 2 * radius
+    else:
+        first = min(positions)
+        start, end = max(first - radius, 0), first + radius
+    snippet = " ".join(text[start:end].split())
+    if start > 0:
+        snippet = "..." + snippet
+    if end < len(text):
+        snippet += "..."
+    return snippet
+
+
+class SearchIndex:
+    """Inverted index over plain-text documents with BM25 ranking.
+
+    Every document belongs to a kind ("page" elements, "blog" posts) and
+    carries arbitrary result fields. Bare query terms match any indexed term
+    they prefix, so partially typed words still find results; quoted phrases
+    must appear verbatim. All terms and phrases of a query must match.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.docs = []
+        self.postings = defaultdict(dict)
+        self.vocabulary = []
+        self._lengths = defaultdict(list)
+        self._avg_length = {}
+        self._idf = {}
+        # Set by the owner to tell rebuilt indexes apart, e.g. in cache keys
+        self.version = None
+
+    def add(self, kind, text, fields):
+        tokens = tokenize(text)
+        doc_id = len(self.docs)
+        self.docs.append(
+            {
+                "kind": kind,
+                "text": text,
+                "normalized": f" {' '.join(tokens)} ",
+                "length": len(tokens),
+                "fields": fields,
+            }
+        )
+        for term, tf in Counter(tokens).items():
+            self.postings[term][doc_id] = tf
+        self._lengths[kind].append(len(tokens))
+
+    def finalize(self):
+        self.vocabulary = sorted(self.postings)
+        self._avg_length = {
+            kind: (sum(lengths) / len(lengths)) or 1.0
+            for kind, lengths in self._lengths.items()
+        }
+        # The BM25 factors that don't depend on the query, computed once
+        self._idf = {
+            term: math.log(1 + (len(self.docs) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        for doc in self.docs:
+            doc["norm"] = self.k1 * (
+                1 - self.b + self.b * doc["length"] / self._avg_length[doc["kind"]]
+            )
+        self.postings = dict(self.postings)
+        return self
+
+    def expand(self, prefix):
+        """All indexed terms starting with prefix."""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+        return self.vocabulary[start:end]
+
+    def search(self, query, kinds=None, limit=100):
+        """Return up to limit (score, doc, matched terms) tuples, best first."""
+        terms, phrases = parse_query(query)
+        if not terms and not phrases:
+            return []
+
+        matched = set()
+        clauses = []
+        for term in terms:
+            expansions = self.expand(term)
+            matched.update(expansions)
+            clauses.append(set().union(*(self.postings[t] for t in expansions)))
+        for phrase in phrases:
+            if any(t not in self.postings for t in phrase):
+                return []
+            matched.update(phrase)
+            clauses.append(set.intersection(*(set(self.postings[t]) for t in phrase)))
+
+        candidates = set.intersection(*clauses)
+        if not candidates:
+            return []
+
+        needles = [" ".join(phrase) for phrase in phrases]
+        candidates = {
+            doc_id
+            for doc_id in candidates
+            if (kinds is None or self.docs[doc_id]["kind"] in kinds)
+            and all(f" {n} " in self.docs[doc_id]["normalized"] for n in needles)
+        }
+
+        scores = defaultdict(float)
+        docs = self.docs
+        boost = self.k1 + 1
+        for term in matched:
+            idf = self._idf[term] * boost
+            postings = self.postings[term]
+            for doc_id in candidates.intersection(postings):
+                tf = postings[doc_id]
+                scores[doc_id] += idf * tf / (tf + docs[doc_id]["norm"])
+
+        results = [(score, doc_id) for doc_id, score in scores.items()]
+        best = heapq.nlargest(limit, results)
+        return [(score, self.docs[doc_id], needles + terms) for score, doc_id in best]
+
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_TEXT_LIMIT = 1000
+
+
+def build_artifact(index):
+    """Serialize an index for client-side search.
+
+    Returns (version, JSON bytes), where version is a content hash suitable
+    for immutable URLs. Terms are sorted so clients can binary search them
+    for prefix matches, postings are flat [doc, tf, doc, tf, ...] lists and
+    document text is capped, so snippets for deep matches fall back to the
+    start of the document.
+    """
+    terms = index.vocabulary
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "avgLength": index._avg_length,
+        "docs": [
+            [
+                doc["kind"],
+                doc["length"],
+                doc["fields"],
+                doc["text"][:ARTIFACT_TEXT_LIMIT],
+                len(doc["text"]) > ARTIFACT_TEXT_LIMIT,
+            ]
+            for doc in index.docs
+        ],
+        "terms": terms,
+        "postings": [
+            [n for item in sorted(index.postings[term].items()) for n in item]
+            for term in terms
+        ],
+    }
+    body = json.dumps(artifact, separators=(",", ":"), ensure_ascii=False)
+    version = hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+    return version, body.encode("utf-8")
@@ -0,0 +1,135 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from html import escape
+from bs4 import BeautifulSoup
+from app.assets import asset_manifest, rewrite_asset_urls
+
+logger = logging.getLogger(__name__)
+
+OG_PROPERTIES = ("og:title", "og:description", "og:image", "og:url", "og:type")
+
+# Private-use code point that never occurs in the source HTML
+_MARKER = "\ue000"
+_MARKER_RE = re.compile(f"{_MARKER}([^{_MARKER}]*){_MARKER}")
+
+
+class HTMLTemplate:
+    """An HTML file compiled once into literal segments and named slots.
+
+    Meta slots are addressed by their ``property`` and filled with escaped
+    attribute values; element slots are addressed by ``id`` and filled with
+    raw HTML. Rendering is a plain string join, and the template recompiles
+    itself when the source file or the asset manifest changes. Static asset
+    URLs are rewritten to their fingerprinted versions at compile time.
+
+    The source is re-stat'ed at most every check_interval seconds; a file
+    watcher can raise it and call invalidate() on changes instead.
+    """
+
+    def __init__(self, path, meta=(), elements=(), check_interval=0.0):
+        self.path = path
+        self.meta = tuple(meta)
+        self.elements = tuple(elements)
+        self.check_interval = check_interval
+        self._checked = None
+        self._signature = None
+        self._compiled = ([""], [], {})
+        self._version = (None, 0.0)
+        self._lock = threading.Lock()
+
+    def _compile(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        defaults = {}
+
+        for prop in self.meta:
+            tag = soup.find("meta", property=prop)
+            if tag is None:
+                logger.warning("No <meta property=%r> in %s", prop, self.path)
+                continue
+            defaults[prop] = escape(tag.get("content", ""), quote=True)
+            tag["content"] = f"{_MARKER}{prop}{_MARKER}"
+
+        for element_id in self.elements:
+            tag = soup.find(id=element_id)
+            if tag is None:
+                logger.warning("No element with id=%r in %s", element_id, self.path)
+                continue
+            tag.clear()
+            tag.append(f"{_MARKER}{element_id}{_MARKER}")
+            defaults[element_id] = ""
+
+        parts = _MARKER_RE.split(rewrite_asset_urls(str(soup)))
+        self._compiled = (parts[0::2], parts[1::2], defaults)
+
+    def invalidate(self):
+        self._checked = None
+
+    def _ensure_compiled(self):
+        assets_digest = asset_manifest.version()
+        now = time.monotonic()
+        if (
+            self._checked is not None
+            and now - self._checked < self.check_interval
+            and self._signature[2] == assets_digest
+        ):
+            return
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size, assets_digest)
+        if signature == self._signature:
+            self._checked = now
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            with open(self.path, "rb") as f:
+                source = f.read()
+            self._compile(source.decode("utf-8"))
+            digest = hashlib.sha256(source + assets_digest.encode()).hexdigest()
+            self._version = (digest, stat.st_mtime)
+            self._signature = signature
+            self._checked = now
+            logger.info("Compiled template %s", self.path)
+
+    def version(self):
+        """Return (hash of the source file and asset manifest, source mtime)."""
+        self._ensure_compiled()
+        return self._version
+
+    def _fill(self, values, hole=None):
+        values = values or {}
+        segments, slots, defaults = self._compiled
+        parts = [segments[0]]
+        for slot, segment in zip(slots, segments[1:]):
+            if slot == hole:
+                parts.append(None)
+            elif slot not in values:
+                parts.append(defaults[slot])
+            elif slot in self.meta:
+                parts.append(escape(str(values[slot]), quote=True))
+            else:
+                parts.append(values[slot])
+            parts.append(segment)
+        return parts
+
+    def render(self, values=None):
+        """Fill the slots from values, falling back to the source defaults."""
+        self._ensure_compiled()
+        return "".join(self._fill(values))
+
+    def split(self, element_id, values=None):
+        """Render around one element slot, returning (prefix, suffix).
+
+        Lets the prefix go out before the slot's content has been rendered.
+        """
+        self._ensure_compiled()
+        parts = self._fill(values, hole=element_id)
+        index = parts.index(None)
+        return "".join(parts[:index]), "".join(parts[index + 1 :])
+
+
+index_shell = HTMLTemplate("index.html", meta=OG_PROPERTIES, elements=("main-content",))
+blog_page = HTMLTemplate("pages/blog.html", elements=("blog-posts",))
@@ -1,50 +1,162 @@
 import os
+import time
+import hashlib
 import logging
-import markdown
+import threading
+from collections import OrderedDict
 import yaml
+from app.render_cache import render_markdown
 
 logger = logging.getLogger(__name__)
 
-file_cache = {}
+
+class FileCache:
+    """Byte-budgeted LRU cache of file contents.
+
+    A cached file is only re-stat'ed when it hasn't been checked for
+    check_interval seconds, so hot files are served without syscalls. Files
+    larger than the whole budget are read but never cached. invalidate()
+    drops entries immediately, for callers that learn about changes sooner.
+    """
+
+    def __init__(self, max_bytes, check_interval=1.0):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, filename):
+        """Return the cache entry (content, mtime, digest) for filename."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None and now - entry["checked"] < self.check_interval:
+                self._entries.move_to_end(filename)
+                self.hits += 1
+                return entry
+
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            self.invalidate(filename)
+            raise
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry["signature"] == signature:
+            with self._lock:
+                entry["checked"] = now
+                self.hits += 1
+            return entry
+
+        with open(filename, "rb") as f:
+            content = f.read()
+        entry = {
+            "content": content,
+            "mtime": stat.st_mtime,
+            "digest": hashlib.sha256(content).hexdigest(),
+            "signature": signature,
+            "checked": now,
+        }
+        with self._lock:
+            self.misses += 1
+            self._discard(filename)
+            if len(content) <= self.max_bytes:
+                self._entries[filename] = entry
+                self._bytes += len(content)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted["content"])
+                self.evictions += 1
+        return entry
+
+    def _discard(self, filename):
+        entry = self._entries.pop(filename, None)
+        if entry is not None:
+            self._bytes -= len(entry["content"])
+
+    def invalidate(self, filename=None):
+        """Drop filename, or every entry when filename is None."""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._discard(filename)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+file_cache = FileCache(
+    max_bytes=int(os.environ.get("FILE_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    check_interval=float(os.environ.get("FILE_CACHE_CHECK_INTERVAL", 1.0)),
+)
 
 
 def read_file(filename):
-    logger.debug(f"Reading file: {filename}")
     try:
-        current_mtime = os.path.getmtime(filename)
-        if filename not in file_cache or current_mtime != file_cache[filename]["mtime"]:
-            with open(filename, "rb") as f:
-                content = f.read()
-            file_cache[filename] = {"content": content, "mtime": current_mtime}
-            logger.debug(f"File {filename} read and cached")
-        else:
-            logger.debug(f"File {filename} served from cache")
-        return file_cache[filename]["content"]
+        return file_cache.get(filename)["content"]
     except FileNotFoundError:
-        logger.error(f"File not found: {filename}")
+        logger.error("File not found: %s", filename)
         raise
     except Exception as e:
-        logger.error(f"Error reading file {filename}: {str(e)}")
+        logger.error("Error reading file %s: %s", filename, e)
         raise
 
 
+def file_version(filename):
+    """Return (sha256 hex digest, mtime) of a file, via the read cache."""
+    entry = file_cache.get(filename)
+    return entry["digest"], entry["mtime"]
+
+
+def hash_file(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
 def parse_markdown_file(file_path):
     with open(file_path, "r", encoding="utf-8") as file:
         content = file.read()
         _, frontmatter, markdown_content = content.split("---", 2)
         metadata = yaml.safe_load(frontmatter)
-        html_content = markdown.markdown(markdown_content, extensions=["fenced_code"])
+        html_content = render_markdown(markdown_content)
         return {**metadata, "content": html_content}
 
 
-def generate_blog_html(posts):
-    html = ""
-    for post in posts:
-        html += f"""
+def parse_post_metadata(file_path):
+    """Parse only the YAML frontmatter of a post, skipping markdown rendering."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        _, frontmatter, _ = file.read().split("---", 2)
+        return yaml.safe_load(frontmatter)
+
+
+def generate_blog_html(posts, next_cursor=None):
+    parts = [f"""
         <article>
             <h2><a hx-get="/blog/{post['slug']}" hx-target="#main-content">{post['title']}</a></h2>
             <p class="post-date">{post['date']}</p>
             <p>{post.get('excerpt', '')}</p>
         </article>
-        """
-    return html
+        """ for post in posts]
+    if next_cursor:
+        # Replaces itself with the next page when scrolled into view or clicked
+        parts.append(f"""
+        <button class="load-more" hx-get="/blog-posts?cursor={next_cursor}" hx-trigger="click, revealed" hx-swap="outerHTML">
+            Load more posts
+        </button>
+        """)
+    return "".join(parts)
@@ -0,0 +1,159 @@
+"""
+Push-based cache invalidation from filesystem events.
+
+While the watcher runs, the in-process caches stop re-stat'ing their
+sources and are invalidated by the watcher instead, so cache hits cost no
+syscalls and new posts show up without a restart. Events come from
+inotify via watchfiles when it is installed, and from polling otherwise;
+either way they are debounced so an editor's write-and-rename lands as one
+change. If the watcher stops, the caches go back to checking for
+themselves.
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+from app.assets import ASSET_DIRS, asset_manifest
+from app.compression import SUFFIXES
+from app.posts import post_store
+from app.templates import index_shell, blog_page
+from app.utils import file_cache
+
+try:
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+WATCH_PATHS = ("blog_posts", "pages", "index.html") + ASSET_DIRS
+DEBOUNCE = 0.2
+POLL_INTERVAL = 1.0
+
+TEMPLATES = (index_shell, blog_page)
+
+
+def _snapshot(paths):
+    signatures = {}
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+            ]
+        for file_path in files:
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            signatures[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def _changed(before, after):
+    return {
+        path for path in set(before) | set(after) if before.get(path) != after.get(path)
+    }
+
+
+class Watcher:
+    def __init__(
+        self, paths=WATCH_PATHS, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL
+    ):
+        self.paths = paths
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._intervals = None
+
+    def _caches(self):
+        return [file_cache, post_store, *TEMPLATES]
+
+    def _take_over(self):
+        """Stop the caches from re-checking their sources on their own."""
+        self._intervals = [cache.check_interval for cache in self._caches()]
+        for cache in self._caches():
+            cache.check_interval = math.inf
+
+    def _hand_back(self):
+        if self._intervals is None:
+            return
+        for cache, interval in zip(self._caches(), self._intervals):
+            cache.check_interval = interval
+        self._intervals = None
+
+    def apply(self, changed):
+        """Invalidate everything derived from the changed files."""
+        changed = {os.path.relpath(path) for path in changed}
+        logger.info("Files changed: %s", ", ".join(sorted(changed)))
+
+        for path in changed:
+            file_cache.invalidate(path)
+        for template in TEMPLATES:
+            if os.path.normpath(template.path) in changed:
+                template.invalidate()
+
+        # Picks up added, edited and removed posts; unchanged ones are kept
+        if any(path.startswith("blog_posts" + os.sep) for path in changed):
+            post_store.refresh(force=True)
+
+        if any(
+            path.startswith(tuple(d + os.sep for d in ASSET_DIRS))
+            and not path.endswith(tuple(SUFFIXES.values()))
+            for path in changed
+        ):
+            asset_manifest.refresh()
+
+    async def _watch_events(self):
+        paths = [path for path in self.paths if os.path.exists(path)]
+        async for changes in watchfiles.awatch(
+            *paths, debounce=int(self.debounce * 1000)
+        ):
+            yield {path for _, path in changes}
+
+    async def _watch_polling(self):
+        before = await asyncio.to_thread(_snapshot, self.paths)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            after = await asyncio.to_thread(_snapshot, self.paths)
+            changed = _changed(before, after)
+            # Keep polling until the files settle
+            while changed:
+                await asyncio.sleep(self.debounce)
+                settled = await asyncio.to_thread(_snapshot, self.paths)
+                more = _changed(after, settled)
+                if not more:
+                    break
+                changed |= more
+                after = settled
+            before = after
+            if changed:
+                yield changed
+
+    async def run(self):
+        watch = self._watch_events if watchfiles is not None else self._watch_polling
+        logger.info(
+            "Watching %s with %s",
+            ", ".join(self.paths),
+            "inotify" if watchfiles is not None else "polling",
+        )
+        self._take_over()
+        try:
+            async for changed in watch():
+                started = time.perf_counter()
+                await asyncio.to_thread(self.apply, changed)
+                logger.info(
+                    "Invalidated caches in %.1f ms",
+                    (time.perf_counter() - started) * 1000,
+                )
+        except Exception as e:
+            logger.error("File watcher stopped: %s", e)
+        finally:
+            self._hand_back()
+
+
+watcher = Watcher()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Cross-posting throughput benchmark against bench/mock_social.py.
+
+Pushes N synthetic posts to all four platforms through the dispatcher
+(.github/workflows/cross_post.py), or through the old one-platform-at-a-time
+sequential loop with --sequential, and prints latency, success rates and the
+mock server's counters as JSON:
+
+    python bench/cross_post_bench.py --posts 50 --latency 0.2 --rate-limit 40
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from argparse import Namespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", ".github", "workflows"
+    ),
+)
+from mock_social import MockConfig, serve
+
+PLATFORMS = ["telegram", "twitter", "mastodon", "devto"]
+
+
+def synthetic_posts(count):
+    posts = {}
+    for i in range(count):
+        slug = f"bench-post-{i:04d}"
+        posts[f"blog_posts/{slug}.md"] = {
+            "metadata": {"hashtags": ["bench"], "tags": ["bench"]},
+            "platforms": list(PLATFORMS),
+            "url": f"https://mlship.dev/blog/{slug}",
+            "title": f"Benchmark post {i}",
+            "abstract": f"Synthetic post {i} for the cross-posting benchmark.",
+        }
+    return posts
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def timed_adapters(adapters, calls):
+    """Wrap each adapter's send to record (platform, seconds, success)."""
+
+    def wrap(platform, send):
+        def timed_send(payload, session, key):
+            started = time.perf_counter()
+            success = send(payload, session, key)
+            calls.append((platform, time.perf_counter() - started, success))
+            return success
+
+        return timed_send
+
+    return {
+        platform: (format_payload, wrap(platform, send))
+        for platform, (format_payload, send) in adapters.items()
+    }
+
+
+def run_sequential(posts, adapters):
+    """What the separate post_to_*.py steps did: one call at a time."""
+    results = {platform: [] for platform in adapters}
+    for platform, (format_payload, send) in adapters.items():
+        for file_path, post_info in posts.items():
+            if send(format_payload(file_path, post_info), None, None):
+                results[platform].append(file_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-posting throughput benchmark")
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--window", type=float, default=10.0)
+    parser.add_argument(
+        "--max-wait", type=float, default=60.0, help="Dispatcher retry budget"
+    )
+    parser.add_argument(
+        "--sequential", action="store_true", help="Post one call at a time instead"
+    )
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        args.latency, args.jitter, args.error_rate, args.rate_limit, args.window
+    )
+    server, url = serve(config)
+    # The scripts read their API base URLs at import time
+    for name in ("TWITTER_API_URL", "TELEGRAM_API_URL", "DEVTO_API_URL"):
+        os.environ[name] = url
+    import cross_post
+    from outbox import Outbox
+
+    credentials = Namespace(
+        telegram_bot_token="bench",
+        telegram_channel_id="@bench",
+        twitter_api_key="bench",
+        twitter_api_secret="bench",
+        twitter_access_token="bench",
+        twitter_access_token_secret="bench",
+        mastodon_instance_url=url,
+        mastodon_access_token="bench",
+        devto_api_key="bench",
+        devto_mode="link",
+    )
+    calls = []
+    adapters = timed_adapters(cross_post.build_adapters(credentials), calls)
+    posts = synthetic_posts(args.posts)
+
+    workdir = os.getcwd()
+    # The outbox and ledger live at relative paths; keep them out of the repo
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            started = time.perf_counter()
+            if args.sequential:
+                results = run_sequential(posts, adapters)
+                pending = None
+            else:
+                outbox = Outbox()
+                results = asyncio.run(
+                    cross_post.dispatch(posts, adapters, outbox, args.max_wait)
+                )
+                pending = len(outbox.jobs) - len(outbox.posted())
+            elapsed = time.perf_counter() - started
+        finally:
+            os.chdir(workdir)
+    server.shutdown()
+
+    mock_stats = server.state.snapshot()
+    report = {
+        "mode": "sequential" if args.sequential else "dispatcher",
+        "posts": args.posts,
+        "jobs": args.posts * len(PLATFORMS),
+        "seconds": round(elapsed, 3),
+        "posted_per_second": round(
+            sum(len(files) for files in results.values()) / elapsed, 2
+        ),
+        "pending": pending,
+        "platforms": {},
+    }
+    for platform in PLATFORMS:
+        latencies = [s for p, s, _ in calls if p == platform]
+        report["platforms"][platform] = {
+            "calls": len(latencies),
+            "posted": len(results.get(platform, [])),
+            "success_rate": round(len(results.get(platform, [])) / args.posts, 3),
+            "p50_ms": (
+                round(percentile(latencies, 0.5) * 1000, 1) if latencies else None
+            ),
+            "p95_ms": (
+                round(percentile(latencies, 0.95) * 1000, 1) if latencies else None
+            ),
+            "server": mock_stats.get(platform, {}),
+        }
+
+    data = json.dumps(report, indent=2)
+    print(data)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(data + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for main.app against synthetic blog corpora.
+
+For each corpus size it writes a site with that many generated posts (the
+rest of the site is symlinked from the repo), boots it under uvicorn, and
+drives each traffic scenario from keep-alive client threads for a fixed
+time. The report is JSON with throughput, p50/p95/p99 latency and the
+server's RSS per scenario:
+
+    python bench/load_test.py --sizes 10 1000 10000 --duration 10 --output load.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Not linked into the generated site: its own posts and caches replace these
+EXCLUDED = {".git", ".cache", "blog_posts", "build", "feed-archive", "bench"}
+
+WORDS = (
+    "model training inference latency throughput gradient tensor pipeline "
+    "dataset feature deploy cluster kubernetes container python rust cache "
+    "benchmark profile memory allocator vector embedding transformer token "
+    "batch shard replica queue stream schema query index search ranking "
+    "monitoring alert metric trace log regression baseline experiment"
+).split()
+TAGS = ["mlops", "python", "rust", "infra", "llm", "databases", "devops", "web"]
+
+
+def sentence(rng, words=(8, 20)):
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(*words)))
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraph(rng):
+    return " ".join(sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def post_markdown(rng, index, day):
+    """A post with the frontmatter fields and markdown features real posts use."""
+    title = sentence(rng, (3, 8)).rstrip(".")
+    slug = f"synthetic-{index:05d}"
+    tags = rng.sample(TAGS, rng.randint(1, 4))
+    lines = [
+        "---",
+        f"title: {json.dumps(title)}",
+        f"slug: {slug}",
+        f'date: "{day.isoformat()}"',
+        f"excerpt: {json.dumps(sentence(rng))}",
+        f"abstract: {json.dumps(sentence(rng))}",
+        f"tags: {json.dumps(tags)}",
+        "platforms:",
+        "  - telegram",
+        "  - twitter",
+        "---",
+        "",
+        f"# {title}",
+        "",
+        paragraph(rng),
+    ]
+    for _ in range(rng.randint(2, 5)):
+        lines += ["", f"## {sentence(rng, (2, 5)).rstrip('.')}", "", paragraph(rng)]
+        if rng.random() < 0.6:
+            lines += [""] + [f"- {sentence(rng, (3, 9))}" for _ in range(4)]
+        if rng.random() < 0.5:
+            lines += [
+                "",
+                "```python",
+                "def handler(batch):",
+                f"    return [{rng.choice(WORDS)}(x) for x in batch]",
+                "```",
+            ]
+        if rng.random() < 0.4:
+            lines += ["", f"See [the docs](https://example.com/{rng.choice(WORDS)})."]
+    return slug, "\n".join(lines) + "\n"
+
+
+def generate_site(directory, count, seed=0):
+    """Link the repo's site files into directory and write count posts.
+
+    Returns the generated slugs.
+    """
+    for name in os.listdir(REPO_ROOT):
+        if name not in EXCLUDED:
+            os.symlink(os.path.join(REPO_ROOT, name), os.path.join(directory, name))
+    posts_dir = os.path.join(directory, "blog_posts")
+    os.makedirs(posts_dir)
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    slugs = []
+    for index in range(count):
+        day = start + timedelta(days=rng.randint(0, 365 * 10))
+        slug, text = post_markdown(rng, index, day)
+        with open(os.path.join(posts_dir, f"{slug}.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+        slugs.append(slug)
+    return slugs
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MiB, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class Server:
+    """uvicorn serving main:app from a generated site directory."""
+
+    def __init__(self, directory, env=None):
+        self.port = free_port()
+        # The app logs at DEBUG; keep it out of the report
+        self.log_path = os.path.join(directory, "server.log")
+        self.log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(self.port),
+                "--log-level",
+                "warning",
+            ],
+            cwd=directory,
+            env={**os.environ, **(env or {})},
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout=900):
+        """Wait until /blog answers; returns seconds from launch.
+
+        The post store loads on the first request that needs it, so this
+        includes parsing the whole corpus.
+        """
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f"uvicorn exited during startup, see {self.log_path}"
+                )
+            try:
+                connection = http.client.HTTPConnection(
+                    "127.0.0.1", self.port, timeout=timeout
+                )
+                connection.request("GET", "/blog")
+                if connection.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("uvicorn did not become ready")
+
+    def rss_mb(self):
+        return rss_mb(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+def scenarios(slugs):
+    """{name: request(rng) -> (path, headers)} for each kind of traffic."""
+    full_pages = ["/", "/about", "/projects", "/blog"]
+
+    def page(rng):
+        if rng.random() < 0.5:
+            return f"/blog/{rng.choice(slugs)}", {}
+        return rng.choice(full_pages), {}
+
+    def fragment(rng):
+        path = f"/blog/{rng.choice(slugs)}" if rng.random() < 0.7 else "/about"
+        return path, {"HX-Request": "true"}
+
+    def api(rng):
+        return f"/api/blog-posts?limit={rng.choice([10, 20, 100])}", {}
+
+    def search(rng):
+        return f"/search?term={rng.choice(WORDS)[:rng.randint(3, 6)]}", {}
+
+    def feeds(rng):
+        return rng.choice(["/atom.xml", "/rss.xml", "/feed.json"]), {}
+
+    weighted = [(page, 5), (fragment, 3), (api, 1), (search, 2), (feeds, 1)]
+
+    def mixed(rng):
+        choice = rng.choices([s for s, _ in weighted], [w for _, w in weighted])[0]
+        return choice(rng)
+
+    return {
+        "page": page,
+        "fragment": fragment,
+        "api": api,
+        "search": search,
+        "feeds": feeds,
+        "mixed": mixed,
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def drive(port, request, duration, concurrency, seed=0):
+    """Run request from concurrency keep-alive clients for duration seconds.
+
+    Returns (latencies in seconds, error count, elapsed seconds).
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(worker):
+        rng = random.Random(seed * 1000 + worker)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine, failed = [], 0
+        while time.perf_counter() < deadline:
+            path, headers = request(rng)
+            headers = {"Accept-Encoding": "br, gzip", **headers}
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            mine.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def run_scenario(server, request, args):
+    """Warm up, then measure one scenario while sampling the server's RSS."""
+    drive(server.port, request, args.warmup, args.concurrency)
+
+    peak = [server.rss_mb()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.2):
+            rss = server.rss_mb()
+            if rss is not None and (peak[0] is None or rss > peak[0]):
+                peak[0] = rss
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        latencies, errors, elapsed = drive(
+            server.port, request, args.duration, args.concurrency
+        )
+    finally:
+        done.set()
+        sampler.join()
+
+    latencies.sort()
+
+    def ms(seconds):
+        return round(seconds * 1000, 2) if seconds is not None else None
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "rss_mb": server.rss_mb(),
+        "rss_mb_peak": peak[0],
+    }
+
+
+def run_corpus(size, args):
+    with tempfile.TemporaryDirectory(prefix=f"load-{size}-") as directory:
+        started = time.perf_counter()
+        slugs = generate_site(directory, size, args.seed)
+        generated = time.perf_counter() - started
+        print(f"Generated {size} posts in {generated:.1f}s", file=sys.stderr)
+
+        env = {} if args.watch else {"WATCH_FILES": "0"}
+        server = Server(directory, env)
+        try:
+            startup = server.wait_ready()
+            result = {
+                "posts": size,
+                "startup_seconds": round(startup, 2),
+                "rss_mb_idle": server.rss_mb(),
+                "scenarios": {},
+            }
+            for name, request in scenarios(slugs).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                stats = run_scenario(server, request, args)
+                result["scenarios"][name] = stats
+                print(
+                    f"  {size:>6} posts {name:<9} {stats['requests_per_second']:>8} req/s "
+                    f"p50 {stats['p50_ms']} ms p99 {stats['p99_ms']} ms",
+                    file=sys.stderr,
+                )
+            return result
+        finally:
+            server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test main.app")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="Corpus sizes"
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        help="Only these of: page fragment api search feeds mixed",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per scenario"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=2.0, help="Unmeasured seconds first"
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--watch", action="store_true", help="Keep the file watcher running"
+    )
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "python": sys.version.split()[0],
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "corpora": [run_corpus(size, args) for size in args.sizes],
+    }
+    data = json.dumps(report, indent=2)
+    print(data)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(data + "\n")
+
+
+if __name__ == "__main__":
+    main()
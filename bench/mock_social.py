@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the social platform APIs the cross-posting scripts call.
+
+Serves POST /2/tweets (Twitter), /api/v1/statuses (Mastodon),
+/bot<token>/sendMessage (Telegram) and /api/articles (Dev.to) with
+configurable latency, error rate and per-platform rate limits that answer
+429 with each platform's own Retry-After / rate-limit headers. GET /stats
+returns per-platform counters; POST /reset clears them.
+
+Point the scripts at it with TWITTER_API_URL, TELEGRAM_API_URL,
+DEVTO_API_URL and the Mastodon instance URL:
+
+    python bench/mock_social.py --port 8765 --latency 0.2 --rate-limit 50
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROUTES = (
+    ("twitter", lambda path: path == "/2/tweets"),
+    ("mastodon", lambda path: path == "/api/v1/statuses"),
+    (
+        "telegram",
+        lambda path: path.startswith("/bot") and path.endswith("/sendMessage"),
+    ),
+    ("devto", lambda path: path == "/api/articles"),
+)
+
+
+class MockConfig:
+    def __init__(
+        self, latency=0.1, jitter=0.05, error_rate=0.0, rate_limit=0, window=60.0
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Accepted posts per platform per window; 0 disables rate limiting
+        self.rate_limit = rate_limit
+        self.window = window
+
+
+class MockState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self.accepted = defaultdict(deque)
+        self.bodies = defaultdict(set)
+        self.idempotency = {}
+
+    def snapshot(self):
+        with self.lock:
+            return {platform: dict(counts) for platform, counts in self.stats.items()}
+
+
+def rate_limit_headers(platform, config, remaining, reset_at):
+    """The headers each platform uses to describe its rate limit."""
+    retry_after = max(1, math.ceil(reset_at - time.time()))
+    if platform == "twitter":
+        return {
+            "x-rate-limit-limit": str(config.rate_limit),
+            "x-rate-limit-remaining": str(remaining),
+            "x-rate-limit-reset": str(math.ceil(reset_at)),
+        }
+    if platform == "mastodon":
+        reset = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(math.ceil(reset_at)))
+        return {
+            "X-RateLimit-Limit": str(config.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": reset,
+        }
+    if remaining == 0:
+        return {"Retry-After": str(retry_after)}
+    return {}
+
+
+def success_body(platform, post_id):
+    if platform == "twitter":
+        return 201, {"data": {"id": post_id, "text": ""}}
+    if platform == "mastodon":
+        return 200, {"id": post_id, "url": f"https://mock.social/@me/{post_id}"}
+    if platform == "telegram":
+        return 200, {"ok": True, "result": {"message_id": int(post_id)}}
+    return 201, {"id": int(post_id), "url": f"https://dev.to/me/{post_id}"}
+
+
+def make_handler(config, state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, state.snapshot())
+            else:
+                self._send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path == "/reset":
+                with state.lock:
+                    state.reset()
+                self._send(200, {})
+                return
+
+            platform = next((p for p, match in ROUTES if match(self.path)), None)
+            if platform is None:
+                self._send(404, {"error": "Not found"})
+                return
+
+            time.sleep(max(0.0, random.gauss(config.latency, config.jitter)))
+
+            key = self.headers.get("Idempotency-Key")
+            with state.lock:
+                reply = self._reply(platform, body, key)
+            self._send(*reply)
+
+        def _reply(self, platform, body, key):
+            """Return (status, body, headers); called with the state lock held."""
+            stats = state.stats[platform]
+            stats["requests"] += 1
+            if key and key in state.idempotency:
+                # A retried request with a known key gets the original reply
+                stats["idempotent_replays"] += 1
+                return state.idempotency[key]
+
+            now = time.time()
+            accepted = state.accepted[platform]
+            while accepted and accepted[0] <= now - config.window:
+                accepted.popleft()
+            reset_at = (accepted[0] if accepted else now) + config.window
+            if config.rate_limit and len(accepted) >= config.rate_limit:
+                stats["rate_limited"] += 1
+                headers = rate_limit_headers(platform, config, 0, reset_at)
+                error = {"error": "Too many requests"}
+                if platform == "telegram":
+                    error = {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": "Too Many Requests",
+                        "parameters": {"retry_after": int(headers["Retry-After"])},
+                    }
+                return 429, error, headers
+
+            if random.random() < config.error_rate:
+                stats["server_errors"] += 1
+                return 503, {"error": "Service unavailable"}, {}
+
+            accepted.append(now)
+            stats["accepted"] += 1
+            if body in state.bodies[platform]:
+                stats["duplicates"] += 1
+            state.bodies[platform].add(body)
+            status, reply = success_body(platform, str(stats["accepted"]))
+            headers = {}
+            if config.rate_limit:
+                remaining = config.rate_limit - len(accepted)
+                headers = rate_limit_headers(platform, config, remaining, reset_at)
+            if key:
+                state.idempotency[key] = (status, reply, headers)
+            return status, reply, headers
+
+    return Handler
+
+
+def serve(config, host="127.0.0.1", port=0):
+    """Start the mock server on a background thread; returns (server, url)."""
+    state = MockState()
+    server = ThreadingHTTPServer((host, port), make_handler(config, state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock social platform APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1, help="Mean seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Latency stddev")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of 503 replies"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=0,
+        help="Accepted posts per platform per window (0: unlimited)",
+    )
+    parser.add_argument("--window", type=float, default=60.0, help="Seconds")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        args.latency, args.jitter, args.error_rate, args.rate_limit, args.window
+    )
+    server, url = serve(config, args.host, args.port)
+    print(f"Mock social APIs on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,35 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from app.routes import blog, pages, search
-from app.config import setup_logging
+from app.routes import assets, blog, feeds, og, pages, search
+from app.config import WATCH_FILES, setup_logging
+from app.watcher import watcher
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(watcher.run()) if WATCH_FILES else None
+    yield
+    if task is not None:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Set up logging
 setup_logging()
 
 # Include routers
 app.include_router(blog.router)
+app.include_router(feeds.router)
+app.include_router(og.router)
 app.include_router(pages.router)
 app.include_router(search.router)
 
-# Serve static files
-app.mount("/", StaticFiles(directory="."), name="static")
+# Serve whitelisted static files (catch-all, so it must come last)
+app.include_router(assets.router)
 
 if __name__ == "__main__":
     import uvicorn
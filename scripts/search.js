@@ -24,6 +24,7 @@ document.addEventListener("DOMContentLoaded", (event) => {
   ];
 
   let pendingHighlight = null;
+  let searchIndex = null;
 
   // Initial welcome message
   output.innerHTML =
@@ -133,8 +134,11 @@ document.addEventListener("DOMContentLoaded", (event) => {
     console.log(`Searching for: "${searchTerm}" in blog posts`);
     output.innerHTML += `<span class="terminal-info">Searching for "${searchTerm}" in blog posts...</span>\n`;
 
-    fetch(`/search-blog?term=${encodeURIComponent(searchTerm)}`)
-      .then((response) => response.json())
+    runSearch(
+      `/search-blog?term=${encodeURIComponent(searchTerm)}`,
+      searchTerm,
+      ["blog"],
+    )
       .then((data) => {
         console.log("Search results:", data);
         if (data.results.length > 0) {
@@ -163,10 +167,14 @@ document.addEventListener("DOMContentLoaded", (event) => {
     console.log(`Searching for: "${searchTerm}" on page: ${page}`);
     output.innerHTML += `<span class="terminal-info">Searching for "${searchTerm}" on ${page === "all" ? "all pages" : page}...</span>\n`;
 
-    fetch(
+    const kinds =
+      page === "all" ? ["page", "blog"] : page === "blog" ? ["blog"] : ["page"];
+
+    runSearch(
       `/search?term=${encodeURIComponent(searchTerm)}&page=${encodeURIComponent(page)}`,
+      searchTerm.toLowerCase(),
+      kinds,
     )
-      .then((response) => response.json())
       .then((data) => {
         console.log("Search results:", data);
         if (data.results.length > 0) {
@@ -206,6 +214,185 @@ document.addEventListener("DOMContentLoaded", (event) => {
       });
   }
 
+  // Search runs locally against the prebuilt index from /search-index.json;
+  // the /search endpoints are only used when the index can't be loaded or
+  // a phrase can't be verified against a document's truncated text.
+  function loadSearchIndex() {
+    if (!searchIndex) {
+      searchIndex = fetch("/search-index.json")
+        .then((response) => response.json())
+        .then((manifest) => fetch(manifest.url))
+        .then((response) => {
+          if (!response.ok) {
+            throw new Error(`Failed to fetch search index: ${response.status}`);
+          }
+          return response.json();
+        })
+        .then((index) => {
+          if (index.format !== 1) {
+            throw new Error(`Unsupported search index format: ${index.format}`);
+          }
+          return index;
+        })
+        .catch((error) => {
+          console.error("Falling back to server-side search:", error);
+          return null;
+        });
+    }
+    return searchIndex;
+  }
+
+  function runSearch(url, searchTerm, kinds) {
+    return loadSearchIndex().then((index) => {
+      const results = index && searchLocally(index, searchTerm, kinds);
+      if (results) {
+        return { results: results, searchTerm: searchTerm };
+      }
+      return fetch(url).then((response) => response.json());
+    });
+  }
+
+  function tokenize(text) {
+    return text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+  }
+
+  function parseQuery(query) {
+    const terms = [];
+    const phrases = [];
+    for (const match of query.matchAll(/"([^"]*)"|(\S+)/g)) {
+      const tokens = tokenize(match[1] !== undefined ? match[1] : match[2]);
+      if (match[1] !== undefined && tokens.length > 1) {
+        phrases.push(tokens);
+      } else {
+        terms.push(...tokens);
+      }
+    }
+    return { terms, phrases };
+  }
+
+  function lowerBound(terms, term) {
+    let low = 0;
+    let high = terms.length;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if (terms[mid] < term) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    return low;
+  }
+
+  function expandTerm(index, prefix) {
+    const matches = [];
+    for (
+      let i = lowerBound(index.terms, prefix);
+      i < index.terms.length && index.terms[i].startsWith(prefix);
+      i++
+    ) {
+      matches.push(i);
+    }
+    return matches;
+  }
+
+  function postingDocs(index, termIds) {
+    const docs = new Set();
+    termIds.forEach((termId) => {
+      const postings = index.postings[termId];
+      for (let i = 0; i < postings.length; i += 2) {
+        docs.add(postings[i]);
+      }
+    });
+    return docs;
+  }
+
+  function makeSnippet(text, needles, radius = 80) {
+    const lowered = text.toLowerCase();
+    const positions = needles
+      .map((needle) => lowered.indexOf(needle))
+      .filter((position) => position >= 0);
+    const first = positions.length ? Math.min(...positions) : -1;
+    const start = first < 0 ? 0 : Math.max(first - radius, 0);
+    const end = first < 0 ? 2 * radius : first + radius;
+    let snippet = text.slice(start, end).split(/\s+/).join(" ").trim();
+    if (start > 0) snippet = "..." + snippet;
+    if (end < text.length) snippet += "...";
+    return snippet;
+  }
+
+  // Mirrors app/search_index.py: AND of prefix-expanded terms and exact
+  // phrases, ranked with BM25. Returns null when a truncated document
+  // might match a phrase, so the caller asks the server instead.
+  function searchLocally(index, query, kinds, limit = 100) {
+    const { terms, phrases } = parseQuery(query);
+    if (!terms.length && !phrases.length) return [];
+
+    const matched = new Set();
+    const clauses = [];
+    for (const term of terms) {
+      const termIds = expandTerm(index, term);
+      termIds.forEach((termId) => matched.add(termId));
+      clauses.push(postingDocs(index, termIds));
+    }
+    for (const phrase of phrases) {
+      const termIds = phrase.map((term) => {
+        const i = lowerBound(index.terms, term);
+        return index.terms[i] === term ? i : -1;
+      });
+      if (termIds.includes(-1)) return [];
+      termIds.forEach((termId) => matched.add(termId));
+      clauses.push(
+        termIds
+          .map((termId) => postingDocs(index, [termId]))
+          .reduce((a, b) => new Set([...a].filter((doc) => b.has(doc)))),
+      );
+    }
+
+    const needles = phrases.map((phrase) => phrase.join(" "));
+    const candidates = new Set();
+    for (const doc of clauses.reduce(
+      (a, b) => new Set([...a].filter((doc) => b.has(doc))),
+    )) {
+      const [kind, , , text, truncated] = index.docs[doc];
+      if (!kinds.includes(kind)) continue;
+      const normalized = ` ${tokenize(text).join(" ")} `;
+      if (needles.every((n) => normalized.includes(` ${n} `))) {
+        candidates.add(doc);
+      } else if (truncated) {
+        // The phrase may be past the end of the truncated text, which only
+        // the server can check
+        return null;
+      }
+    }
+
+    const k1 = 1.2;
+    const b = 0.75;
+    const scores = new Map();
+    matched.forEach((termId) => {
+      const postings = index.postings[termId];
+      const df = postings.length / 2;
+      const idf = Math.log(1 + (index.docs.length - df + 0.5) / (df + 0.5));
+      for (let i = 0; i < postings.length; i += 2) {
+        const doc = postings[i];
+        if (!candidates.has(doc)) continue;
+        const [kind, length] = index.docs[doc];
+        const tf = postings[i + 1];
+        const norm = 1 - b + (b * length) / index.avgLength[kind];
+        const score = (idf * tf * (k1 + 1)) / (tf + k1 * norm);
+        scores.set(doc, (scores.get(doc) || 0) + score);
+      }
+    });
+
+    return [...scores.entries()]
+      .sort((a, b) => b[1] - a[1])
+      .slice(0, limit)
+      .map(([doc]) => {
+        const [, , fields, text] = index.docs[doc];
+        return { ...fields, excerpt: makeSnippet(text, needles.concat(terms)) };
+      });
+  }
+
   function navigateTo(page) {
     console.log(`Navigating to: ${page}`);
     output.innerHTML += `<div class="terminal-success">Navigating to ${page}...</div>`;